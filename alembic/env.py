@@ -4,6 +4,7 @@ from sqlalchemy import engine_from_config, pool
 
 from alembic import context
 from src.database.core import Base
+from src.entities.refresh_token import RefreshToken
 from src.entities.user import User
 from src.settings import settings
 
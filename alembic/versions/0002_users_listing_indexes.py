@@ -0,0 +1,69 @@
+"""users listing indexes
+
+Indexes backing keyset pagination of GET /users. On PostgreSQL they are
+built CONCURRENTLY so the users table stays writable during the migration.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_created_at_id",
+            "users",
+            ["created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_disabled_created_at_id",
+            "users",
+            ["disabled", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        if is_postgresql:
+            op.create_index(
+                "ix_users_email_pattern",
+                "users",
+                ["email"],
+                postgresql_ops={"email": "varchar_pattern_ops"},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        if is_postgresql:
+            op.drop_index(
+                "ix_users_email_pattern",
+                table_name="users",
+                postgresql_concurrently=True,
+            )
+        op.drop_index(
+            "ix_users_disabled_created_at_id",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_created_at_id",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
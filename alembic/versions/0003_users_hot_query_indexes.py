@@ -0,0 +1,102 @@
+"""users hot query indexes
+
+Makes email unique case-insensitively, and replaces the status and email
+prefix listing indexes from 0002 with a partial index over active users
+and a lower(email) pattern index.
+
+Building ix_users_email_lower fails if existing emails differ only in
+case; merge or rename those accounts before upgrading.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+lower_email = sa.func.lower(sa.column("email"))
+active = sa.column("disabled").is_(False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_email_lower",
+            "users",
+            [lower_email],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_active_created_at_id",
+            "users",
+            ["created_at", "id"],
+            postgresql_where=active,
+            sqlite_where=active,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_disabled_created_at_id",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        if is_postgresql:
+            op.create_index(
+                "ix_users_email_lower_pattern",
+                "users",
+                [lower_email.label("lower_email")],
+                postgresql_ops={"lower_email": "varchar_pattern_ops"},
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                "ix_users_email_pattern",
+                table_name="users",
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        if is_postgresql:
+            op.create_index(
+                "ix_users_email_pattern",
+                "users",
+                ["email"],
+                postgresql_ops={"email": "varchar_pattern_ops"},
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                "ix_users_email_lower_pattern",
+                table_name="users",
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            "ix_users_disabled_created_at_id",
+            "users",
+            ["disabled", "created_at", "id"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_active_created_at_id",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_email_lower",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,261 @@
+"""
+Load generator for /auth/token and /users/me.
+
+Starts the app under uvicorn on a throwaway SQLite database (or targets
+--url), seeds one user, then keeps --concurrency requests in flight for
+--duration seconds after a warm-up. Prints a JSON report with p50/p95/p99
+latency, requests per second and status counts, tagged with the current
+commit so runs can be compared over time.
+
+The login rate limits are raised for the spawned server so /auth/token
+measures hashing rather than the limiter.
+
+Usage:
+    python -m benchmarks.bench_load --scenario users-me --concurrency 64
+    python -m benchmarks.bench_load --scenario token --workers 4 --output token.json
+    python -m benchmarks.bench_load --url http://localhost:8000 \\
+        --email someone@example.com --password secret
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.auth.hashing import hash_password
+from src.entities.user import User
+
+SCENARIOS = ("token", "users-me")
+UNLIMITED = "1000000/minute"
+
+
+def seed_user(database_url: str, email: str, password: str) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        env={**os.environ, "DATABASE_URL": database_url},
+        check=True,
+        capture_output=True,
+    )
+    engine = create_engine(database_url)
+    with Session(engine) as session:
+        session.add(
+            User(
+                email=email,
+                first_name="Load",
+                last_name="Test",
+                password_hash=hash_password(password),
+            )
+        )
+        session.commit()
+    engine.dispose()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def uvicorn_server(database_url: str, workers: int) -> Iterator[str]:
+    """
+    Run `src.main:app` under uvicorn and yield its base URL once it answers.
+    """
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "load-test"),
+        "LOGIN_RATE_LIMIT_PER_IP": UNLIMITED,
+        "LOGIN_RATE_LIMIT_PER_ACCOUNT": UNLIMITED,
+        "LOG_LEVEL": "WARN",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app"]
+        + ["--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+        + ["--no-access-log", "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if httpx.get(f"{base_url}/readyz").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start within 30s")
+            time.sleep(0.1)
+        yield base_url
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    response = await client.post(
+        "/api/v1/auth/token", data={"username": email, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_load(
+    base_url: str,
+    scenario: str,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    email: str,
+    password: str,
+) -> dict[str, Any]:
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30
+    ) as client:
+        if scenario == "token":
+            request = client.build_request(
+                "POST",
+                "/api/v1/auth/token",
+                data={"username": email, "password": password},
+            )
+        else:
+            token = await login(client, email, password)
+            request = client.build_request(
+                "GET",
+                "/api/v1/users/me",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+        latencies: list[float] = []
+        statuses: Counter[str] = Counter()
+
+        async def worker(until: float, record: bool) -> None:
+            while time.perf_counter() < until:
+                started = time.perf_counter()
+                try:
+                    response = await client.send(request)
+                    status = str(response.status_code)
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[status] += 1
+
+        for record, seconds in ((False, warmup), (True, duration)):
+            until = time.perf_counter() + seconds
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(until, record) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    return report(scenario, base_url, concurrency, elapsed, latencies, statuses)
+
+
+def percentiles(latencies: list[float]) -> dict[str, float]:
+    if len(latencies) < 2:
+        return {}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "p50": round(cuts[49] * 1000, 3),
+        "p95": round(cuts[94] * 1000, 3),
+        "p99": round(cuts[98] * 1000, 3),
+        "max": round(max(latencies) * 1000, 3),
+    }
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(
+    scenario: str,
+    base_url: str,
+    concurrency: int,
+    elapsed: float,
+    latencies: list[float],
+    statuses: Counter[str],
+) -> dict[str, Any]:
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    return {
+        "scenario": scenario,
+        "url": base_url,
+        "commit": current_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(latencies),
+        "errors": len(latencies) - ok,
+        "rps": round(len(latencies) / elapsed, 1),
+        "latency_ms": percentiles(latencies),
+        "status_codes": dict(statuses),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=SCENARIOS, default="users-me")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--url", help="target a running server instead")
+    parser.add_argument("--email", default="load-test@example.com")
+    parser.add_argument("--password", default="load-test-password")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    load = dict(
+        scenario=args.scenario,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        warmup=args.warmup,
+        email=args.email,
+        password=args.password,
+    )
+    if args.url:
+        result = asyncio.run(run_load(args.url, **load))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            database_url = f"sqlite:///{os.path.join(tmp, 'load.db')}"
+            seed_user(database_url, args.email, args.password)
+            with uvicorn_server(database_url, args.workers) as base_url:
+                result = asyncio.run(run_load(base_url, **load))
+
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
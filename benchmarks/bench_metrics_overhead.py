@@ -0,0 +1,61 @@
+"""
+Overhead of MetricsMiddleware and the query hooks per request.
+
+Times a route that runs one SQLite query, first on a bare app and then with
+MetricsMiddleware installed and `track_queries` hooked onto the engine,
+and reports the added p50 latency.
+
+Usage:
+    python -m benchmarks.bench_metrics_overhead --requests 20000
+"""
+
+import argparse
+import asyncio
+import sys
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from benchmarks.common import measure, summarize
+from src.metrics import MetricsMiddleware, track_queries
+
+
+def make_app(instrumented: bool) -> FastAPI:
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    if instrumented:
+        track_queries(engine)
+
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        with engine.connect() as conn:
+            return {"value": conn.execute(text("SELECT 1")).scalar()}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    bare = summarize(
+        "bare", asyncio.run(measure(make_app(False), "/ping", args.requests))
+    )
+    instrumented = summarize(
+        "metrics", asyncio.run(measure(make_app(True), "/ping", args.requests))
+    )
+    print(f"overhead: {instrumented - bare:+.1f} us per request (p50)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Micro-benchmarks for the auth and users hot paths, using pytest-benchmark.
+
+Not collected by the functional test run; invoke the file explicitly and
+keep the JSON output to compare commits:
+
+    python -m pytest benchmarks/bench_micro.py --benchmark-json=micro.json
+    python -m pytest benchmarks/bench_micro.py --benchmark-compare
+"""
+
+from datetime import datetime, timedelta
+
+import pydantic_core
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from src.auth.service import (
+    create_access_token,
+    get_password_hash,
+    token_cache,
+    verify_token,
+)
+from src.database.core import Base
+from src.entities.user import User
+from src.users.model import UserResponse
+from src.users.service import get_user_by_id
+
+
+@pytest.fixture(scope="module")
+def user() -> User:
+    return User(
+        id=42,
+        email="bench@example.com",
+        first_name="Bench",
+        last_name="User",
+        password_hash="x",
+        image_url="https://cdn.example.com/avatars/42.png",
+        disabled=False,
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+    )
+
+
+@pytest.fixture(scope="module")
+def db(user: User):
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(User(**{c.key: getattr(user, c.key) for c in User.__table__.c}))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def token() -> str:
+    return create_access_token("bench@example.com", 42, timedelta(minutes=30))
+
+
+def test_create_access_token(benchmark):
+    benchmark(create_access_token, "bench@example.com", 42, timedelta(minutes=30))
+
+
+def test_verify_token_cached(benchmark, token: str):
+    verify_token(token)
+    benchmark(verify_token, token)
+
+
+def test_verify_token_uncached(benchmark, token: str):
+    def setup():
+        token_cache.clear()
+        return (token,), {}
+
+    benchmark.pedantic(verify_token, setup=setup, rounds=2000)
+
+
+def test_get_password_hash(benchmark):
+    benchmark.pedantic(get_password_hash, args=("correct horse battery",), rounds=20)
+
+
+def test_get_user_by_id(benchmark, db: Session):
+    def lookup() -> User:
+        user = get_user_by_id(db, 42)
+        # Drop the identity map so every round goes to the database.
+        db.expunge_all()
+        return user
+
+    benchmark(lookup)
+
+
+def test_user_response_validate(benchmark, user: User):
+    benchmark(UserResponse.model_validate, user)
+
+
+def test_user_response_to_json(benchmark, user: User):
+    profile = UserResponse.model_validate(user)
+    benchmark(pydantic_core.to_json, profile)
@@ -0,0 +1,80 @@
+"""
+Cold-start benchmark: import time of src.main and lifespan warm-up time.
+
+Each run is a fresh interpreter, as in a newly scheduled pod, which
+imports the app and then enters and leaves its lifespan. Reports the
+median of --runs and, with --top, the slowest imports by cumulative time
+(from `python -X importtime`).
+
+Usage:
+    python -m benchmarks.bench_startup --runs 10 --top 15
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+
+async def cycle():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+    return ready
+
+ready = asyncio.run(cycle())
+print(json.dumps({"import": imported - started, "warm_up": ready - imported}))
+"""
+
+
+def run_once() -> dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list[tuple[float, str]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=0)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for phase in ("import", "warm_up"):
+        times = [run[phase] * 1000 for run in runs]
+        print(
+            f"{phase:>10}: median {statistics.median(times):7.1f} ms  "
+            f"min {min(times):7.1f} ms"
+        )
+
+    if args.top:
+        print("\nslowest imports (cumulative):")
+        for ms, name in slowest_imports(args.top):
+            print(f"{ms:9.1f} ms  {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
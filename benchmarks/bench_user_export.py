@@ -0,0 +1,110 @@
+"""
+Throughput and memory benchmark for the streaming user export.
+
+Seeds a throwaway SQLite database, streams the whole table through
+`export_users` into /dev/null and reports rows/s. Fails if peak RSS grows
+by more than --max-rss-growth-mb during the export, which would mean rows
+are being buffered instead of streamed.
+
+Usage:
+    python -m benchmarks.bench_user_export --rows 500000 --format csv --gzip
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from src.database.core import Base
+from src.entities.user import User
+from src.users.exporter import export_users
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def seed(url: str, rows: int, batch_size: int = 10_000) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    now = datetime(2024, 1, 1)
+    for start in range(0, rows, batch_size):
+        session.execute(
+            insert(User),
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "first_name": "Bench",
+                    "last_name": f"User {i}",
+                    "password_hash": "x" * 97,
+                    "image_url": "",
+                    "disabled": i % 10 == 0,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for i in range(start, min(start + batch_size, rows))
+            ],
+        )
+    session.commit()
+    session.close()
+    engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=64.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        # Seed in a child process so its allocations don't mask the export's
+        # peak RSS in this one.
+        seeder = multiprocessing.Process(target=seed, args=(url, args.rows))
+        seeder.start()
+        seeder.join()
+
+        engine = create_engine(url)
+
+        with Session(engine) as session, open(os.devnull, "wb") as sink:
+            rss_before = peak_rss_mb()
+            started = time.perf_counter()
+            written = 0
+            for chunk in export_users(
+                session, args.format, gzip=args.gzip, batch_size=args.batch_size
+            ):
+                written += len(chunk)
+                sink.write(chunk)
+            elapsed = time.perf_counter() - started
+            rss_growth = peak_rss_mb() - rss_before
+        engine.dispose()
+
+    print(
+        f"exported {args.rows} rows ({written / 1e6:.1f} MB, {args.format}"
+        f"{' gzip' if args.gzip else ''}) in {elapsed:.2f}s: "
+        f"{args.rows / elapsed:,.0f} rows/s, peak RSS +{rss_growth:.1f} MB"
+    )
+    if rss_growth > args.max_rss_growth_mb:
+        print(
+            f"FAIL: peak RSS grew by more than {args.max_rss_growth_mb} MB",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Latency micro-benchmark for the /users/me response path.
+
+Serves the same profile two ways on in-process ASGI apps and times
+requests through the ASGI interface:
+
+* before: stdlib JSONResponse, the ORM row returned to a
+  `response_model=UserResponse` route (validate, dump to dict, json.dumps);
+* after: ORJSONResponse default and a pre-validated UserResponse returned
+  as ModelResponse (pydantic-core straight to bytes), as /users/me does now.
+
+Authentication and the database are left out so only the response path
+is measured.
+
+Usage:
+    python -m benchmarks.bench_users_me --requests 20000
+"""
+
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks.common import measure, summarize
+from src.entities.user import User
+from src.responses import ModelResponse, ORJSONResponse
+from src.users.model import UserResponse
+
+
+def make_user() -> User:
+    return User(
+        id=42,
+        email="bench@example.com",
+        first_name="Bench",
+        last_name="User",
+        password_hash="x",
+        image_url="https://cdn.example.com/avatars/42.png",
+        disabled=False,
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+    )
+
+
+def before_app(user: User) -> FastAPI:
+    app = FastAPI(default_response_class=JSONResponse)
+
+    @app.get("/users/me", response_model=UserResponse)
+    def get_current_user():
+        return user
+
+    return app
+
+
+def after_app(user: User) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+    profile = UserResponse.model_validate(user)
+
+    @app.get("/users/me", response_model=UserResponse)
+    def get_current_user():
+        return ModelResponse(profile)
+
+    return app
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    user = make_user()
+    before = summarize(
+        "before", asyncio.run(measure(before_app(user), "/users/me", args.requests))
+    )
+    after = summarize(
+        "after", asyncio.run(measure(after_app(user), "/users/me", args.requests))
+    )
+    print(f"p50 speedup: {before / after:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
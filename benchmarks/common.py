@@ -0,0 +1,77 @@
+"""
+Helpers shared by the in-process ASGI latency benchmarks.
+
+Requests are driven straight through the ASGI interface, without an HTTP
+client or sockets, so the numbers reflect the application's own cost.
+"""
+
+import statistics
+import time
+
+from starlette.types import ASGIApp, Message
+
+
+async def request(
+    app: ASGIApp, path: str, headers: dict[str, str] | None = None
+) -> int:
+    """
+    Send one GET through `app` and return the response status.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in {"host": "bench", **(headers or {})}.items()
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive() -> Message:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(
+    app: ASGIApp, path: str, requests: int, headers: dict[str, str] | None = None
+) -> list[float]:
+    """
+    Per-request latencies in seconds for GET `path`, after a short warm-up.
+    """
+    for _ in range(min(requests // 10, 1000)):
+        await request(app, path, headers)
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        status = await request(app, path, headers)
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            raise RuntimeError(f"GET {path} returned {status}")
+    return latencies
+
+
+def summarize(name: str, latencies: list[float]) -> float:
+    """
+    Print p50/p99 in microseconds and return the p50.
+    """
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1e6
+    print(f"{name:>10}: p50 {p50:7.1f} us  p99 {p99:7.1f} us")
+    return p50
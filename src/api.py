@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 
 from src.auth.controller import router as auth_router
+from src.health import router as health_router
+from src.metrics import router as metrics_router
 from src.users.controller import router as users_router
 
 API_PREFIX = "/api/v1"
@@ -9,3 +11,5 @@ API_PREFIX = "/api/v1"
 def register_routes(app: FastAPI):
     app.include_router(auth_router, prefix=API_PREFIX)
     app.include_router(users_router, prefix=API_PREFIX)
+    app.include_router(metrics_router)
+    app.include_router(health_router)
@@ -1,25 +1,79 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Request, status
-from fastapi.security import OAuth2PasswordRequestForm
+from fastapi import APIRouter, Depends, Request, Response, status
 from src.auth import model, service
-from src.database.core import DbSession
+from src.database.core import AsyncDbSession, DbSession, use_async_db
+from src.responses import ModelResponse
+from src.settings import settings
 
 from ..rate_limiting import limiter
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+# Token responses must not be cached (RFC 6749 5.1), nor stored for
+# Idempotency-Key replays.
+TOKEN_HEADERS = {"Cache-Control": "no-store"}
 
-@router.post("/", status_code=status.HTTP_201_CREATED)
-@limiter.limit("5/hour")
-async def register_user(
-    request: Request, db: DbSession, register_user_request: model.RegisterUserRequest
-):
-    service.register_user(db, register_user_request)
 
+if use_async_db("auth.register"):
 
-@router.post("/token", response_model=model.Token)
-async def login_for_access_token(
-    form_data: Annotated[OAuth2PasswordRequestForm, Depends()], db: DbSession
-):
-    return service.login_for_access_token(form_data, db)
+    @router.post("/", status_code=status.HTTP_201_CREATED)
+    @limiter.limit("5/hour")
+    async def register_user(
+        request: Request,
+        db: AsyncDbSession,
+        register_user_request: model.RegisterUserRequest,
+    ):
+        await service.register_user_async(db, register_user_request)
+
+else:
+
+    @router.post("/", status_code=status.HTTP_201_CREATED)
+    @limiter.limit("5/hour")
+    def register_user(
+        request: Request,
+        db: DbSession,
+        register_user_request: model.RegisterUserRequest,
+    ):
+        service.register_user(db, register_user_request)
+
+
+if use_async_db("auth.token"):
+
+    @router.post("/token", response_model=model.Token)
+    @limiter.limit(settings.LOGIN_RATE_LIMIT_PER_IP)
+    async def login_for_access_token(
+        request: Request,
+        form_data: Annotated[model.TokenRequestForm, Depends()],
+        db: AsyncDbSession,
+    ):
+        if form_data.grant_type == "refresh_token":
+            token = await service.refresh_access_token_async(
+                form_data.refresh_token, db
+            )
+        else:
+            token = await service.login_for_access_token_async(form_data, db)
+        return ModelResponse(token, headers=TOKEN_HEADERS)
+
+else:
+
+    @router.post("/token", response_model=model.Token)
+    @limiter.limit(settings.LOGIN_RATE_LIMIT_PER_IP)
+    def login_for_access_token(
+        request: Request,
+        form_data: Annotated[model.TokenRequestForm, Depends()],
+        db: DbSession,
+    ):
+        if form_data.grant_type == "refresh_token":
+            token = service.refresh_access_token(form_data.refresh_token, db)
+        else:
+            token = service.login_for_access_token(form_data, db)
+        return ModelResponse(token, headers=TOKEN_HEADERS)
+
+
+@router.get("/jwks.json")
+def get_jwks(response: Response):
+    response.headers["Cache-Control"] = (
+        f"public, max-age={int(settings.JWT_KEYS_RELOAD_SECONDS)}"
+    )
+    return service.get_jwks()
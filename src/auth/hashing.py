@@ -0,0 +1,143 @@
+"""
+Bounded executor for password hashing.
+
+Argon2 is deliberately CPU and memory hungry, so hashing and verification
+are pushed onto a dedicated thread or process pool instead of running on
+the event loop. The pool only accepts a fixed amount of outstanding work;
+once it is saturated new requests are shed with a 503 and a Retry-After
+header rather than queueing behind each other.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+from src.exceptions import ServiceUnavailableError
+from src.metrics import time_password_hash
+from src.settings import settings
+from src.tracing import span
+
+T = TypeVar("T")
+
+# Hashes produced with other parameters still verify; verify_and_update
+# reports them so they can be upgraded to the current profile on login.
+password_hash = PasswordHash(
+    (
+        Argon2Hasher(
+            time_cost=settings.ARGON2_TIME_COST,
+            memory_cost=settings.ARGON2_MEMORY_COST,
+            parallelism=settings.ARGON2_PARALLELISM,
+        ),
+    )
+)
+
+
+def hash_password(password: str) -> str:
+    return password_hash.hash(password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hash.verify(plain_password, hashed_password)
+
+
+def check_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password, returning a fresh hash if the stored one is outdated.
+    """
+    return password_hash.verify_and_update(plain_password, hashed_password)
+
+
+class HashingExecutor:
+    """
+    Thread or process pool with a hard cap on queued plus running jobs.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int = 0,
+        queue_depth: int = 32,
+        retry_after: int = 1,
+    ):
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = self.max_workers + queue_depth
+        self.retry_after = retry_after
+
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # Spawn rather than fork: the pool is created lazily, after the
+                # logging listener and threadpool threads are already running.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    def _release(self, _future: Future | None = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> "Future[T]":
+        """
+        Schedule `fn` on the pool, raising ServiceUnavailableError when full.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ServiceUnavailableError(
+                    "Too many concurrent authentication requests",
+                    retry_after=self.retry_after,
+                )
+            self._pending += 1
+            executor = self._get_executor()
+
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with span(f"password.{fn.__name__}"), time_password_hash(fn.__name__):
+            return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        with span(f"password.{fn.__name__}"), time_password_hash(fn.__name__):
+            return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+executor = HashingExecutor(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_depth=settings.PASSWORD_HASH_QUEUE_DEPTH,
+    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+)
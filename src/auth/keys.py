@@ -0,0 +1,182 @@
+"""
+JWT signing and verification keys.
+
+With the default HS256 algorithm tokens are signed with `SECRET_KEY`. For
+EdDSA or ES256 the keys live as PEM files in `JWT_KEYS_DIR`:
+
+    <kid>.pem       private key; the lexicographically greatest kid signs
+    <kid>.pub.pem   public key only; still accepted for verification
+
+Rotating a key means dropping a new `<kid>.pem` next to the old one (and
+later demoting the old one to `.pub.pem`). Each process re-scans the
+directory at most every `JWT_KEYS_RELOAD_SECONDS`, so no restart is needed.
+Parsed key objects are cached, so verification never re-reads a PEM.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import get_default_algorithms
+
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+PRIVATE_SUFFIX = ".pem"
+PUBLIC_SUFFIX = ".pub.pem"
+
+KEY_TYPES = {
+    "EdDSA": (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey),
+    "ES256": (ec.EllipticCurvePrivateKey, ec.EllipticCurvePublicKey),
+}
+
+
+class KeySet:
+    """
+    An immutable snapshot of the signing key and all verification keys.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        signing_kid: str | None,
+        signing_key: Any,
+        verification_keys: dict[str | None, Any],
+    ):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self.signing_key = signing_key
+        self.verification_keys = verification_keys
+
+    def verification_key(self, kid: str | None) -> Any | None:
+        if kid is None:
+            # Tokens without a kid predate rotation; try the current key.
+            return self.verification_keys.get(self.signing_kid)
+        return self.verification_keys.get(kid)
+
+    def jwks(self) -> dict[str, list[dict[str, Any]]]:
+        if self.algorithm == "HS256":
+            return {"keys": []}
+
+        jwt_algorithm = get_default_algorithms()[self.algorithm]
+        keys = []
+        for kid, public_key in sorted(self.verification_keys.items()):
+            jwk = jwt_algorithm.to_jwk(public_key, as_dict=True)
+            jwk.update(kid=kid, alg=self.algorithm, use="sig")
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+def _check_key_type(algorithm: str, key: Any, path: Path) -> None:
+    private_type, public_type = KEY_TYPES[algorithm]
+    if algorithm == "ES256":
+        curve = getattr(key, "curve", None)
+        if not isinstance(curve, ec.SECP256R1):
+            raise ValueError(f"{path.name}: ES256 requires a P-256 key")
+    if not isinstance(key, (private_type, public_type)):
+        raise ValueError(f"{path.name}: key type does not match {algorithm}")
+
+
+def load_key_set(algorithm: str, keys_dir: str | Path) -> KeySet:
+    """
+    Parse every PEM in `keys_dir` into a KeySet for an asymmetric algorithm.
+    """
+    directory = Path(keys_dir)
+    private_keys: dict[str, Any] = {}
+    public_keys: dict[str | None, Any] = {}
+
+    for path in sorted(directory.glob("*.pem")):
+        data = path.read_bytes()
+        if path.name.endswith(PUBLIC_SUFFIX):
+            kid = path.name[: -len(PUBLIC_SUFFIX)]
+            key = serialization.load_pem_public_key(data)
+            _check_key_type(algorithm, key, path)
+            public_keys[kid] = key
+        else:
+            kid = path.name[: -len(PRIVATE_SUFFIX)]
+            key = serialization.load_pem_private_key(data, password=None)
+            _check_key_type(algorithm, key, path)
+            private_keys[kid] = key
+            public_keys[kid] = key.public_key()
+
+    if not private_keys:
+        raise ValueError(f"No private signing key found in {directory}")
+
+    signing_kid = max(private_keys)
+    return KeySet(algorithm, signing_kid, private_keys[signing_kid], public_keys)
+
+
+class KeyStore:
+    """
+    Hands out the current KeySet, reloading it when the key directory changes.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret_key: str,
+        keys_dir: str | None,
+        reload_seconds: float,
+    ):
+        self.algorithm = algorithm
+        self.secret_key = secret_key
+        self.keys_dir = keys_dir
+        self.reload_seconds = reload_seconds
+
+        self._key_set: KeySet | None = None
+        self._fingerprint: tuple | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _directory_fingerprint(self) -> tuple:
+        assert self.keys_dir is not None
+        return tuple(
+            (path.name, path.stat().st_mtime_ns)
+            for path in sorted(Path(self.keys_dir).glob("*.pem"))
+        )
+
+    def get(self) -> KeySet:
+        if self.algorithm == "HS256":
+            if self._key_set is None:
+                self._key_set = KeySet(
+                    "HS256", None, self.secret_key, {None: self.secret_key}
+                )
+            return self._key_set
+
+        now = time.monotonic()
+        if self._key_set is not None and now - self._checked_at < self.reload_seconds:
+            return self._key_set
+
+        with self._lock:
+            if self._key_set is None or now - self._checked_at >= self.reload_seconds:
+                self._checked_at = now
+                fingerprint = self._directory_fingerprint()
+                if fingerprint != self._fingerprint:
+                    try:
+                        self._key_set = load_key_set(self.algorithm, self.keys_dir)
+                        self._fingerprint = fingerprint
+                        logger.info(
+                            "Loaded JWT keys from %s; signing kid: %s",
+                            self.keys_dir,
+                            self._key_set.signing_kid,
+                        )
+                    except Exception as e:
+                        if self._key_set is None:
+                            raise
+                        logger.error(
+                            "Failed to reload JWT keys, keeping old set: %s", e
+                        )
+        return self._key_set
+
+
+key_store = KeyStore(
+    algorithm=settings.JWT_ALGORITHM,
+    secret_key=settings.SECRET_KEY,
+    keys_dir=settings.JWT_KEYS_DIR,
+    reload_seconds=settings.JWT_KEYS_RELOAD_SECONDS,
+)
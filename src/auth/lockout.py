@@ -0,0 +1,251 @@
+"""
+Login throttling that runs before any password hashing or database work.
+
+Two cheap checks guard `/auth/token`:
+
+* a per-account rate limit counted in the shared rate-limit storage, so it
+  holds across workers, and
+* an exponential-backoff lockout: after LOGIN_LOCKOUT_THRESHOLD
+  consecutive failures an email is locked for LOGIN_LOCKOUT_BASE_SECONDS,
+  doubling with every further failure up to LOGIN_LOCKOUT_MAX_SECONDS.
+  A successful login clears the entry.
+
+Lockouts live in the same storage as the rate limits. With a redis
+RATE_LIMIT_STORAGE_URI every worker and pod shares failure counts and
+locks, which are kept as wall-clock deadlines. With "memory://" they are
+per process. The `*_async` variants run storage calls in the threadpool
+unless everything is in memory, so async logins never block the event
+loop on a round trip.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Protocol
+
+from limits import parse
+from limits.storage import MemoryStorage, RedisStorage
+from starlette.concurrency import run_in_threadpool
+
+from src.cache import TTLCache
+from src.exceptions import TooManyLoginAttemptsError
+from src.rate_limiting import limiter
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class LockoutBackend(Protocol):
+    def add_failure(self, email: str) -> int:
+        """
+        Count a failed login and return the consecutive failures so far.
+        """
+        ...
+
+    def lock(self, email: str, until: float) -> None: ...
+
+    def locked_until(self, email: str) -> float: ...
+
+    def delete(self, email: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryLockoutBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        # email -> (consecutive failures, locked until)
+        self._table: TTLCache[str, tuple[int, float]] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        self._lock = threading.Lock()
+
+    def add_failure(self, email: str) -> int:
+        with self._lock:
+            failures, locked_until = self._table.get(email) or (0, 0.0)
+            self._table.set(email, (failures + 1, locked_until))
+            return failures + 1
+
+    def lock(self, email: str, until: float) -> None:
+        with self._lock:
+            failures, _ = self._table.get(email) or (0, 0.0)
+            self._table.set(email, (failures, until))
+
+    def locked_until(self, email: str) -> float:
+        entry = self._table.get(email)
+        return 0.0 if entry is None else entry[1]
+
+    def delete(self, email: str) -> None:
+        self._table.pop(email)
+
+    def clear(self) -> None:
+        self._table.clear()
+
+
+class RedisLockoutBackend:
+    """
+    Keeps each email's failures and lock deadline in a redis hash, using any
+    client exposing the redis-py `hincrby`/`hset`/`hget`/`expire`/`delete`/
+    `scan_iter` methods.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "login-lockout:"):
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+
+    def add_failure(self, email: str) -> int:
+        key = f"{self.prefix}{email}"
+        failures = self.client.hincrby(key, "failures", 1)
+        self.client.expire(key, self.ttl)
+        return int(failures)
+
+    def lock(self, email: str, until: float) -> None:
+        self.client.hset(f"{self.prefix}{email}", "locked_until", repr(until))
+
+    def locked_until(self, email: str) -> float:
+        raw = self.client.hget(f"{self.prefix}{email}", "locked_until")
+        return 0.0 if raw is None else float(raw)
+
+    def delete(self, email: str) -> None:
+        self.client.delete(f"{self.prefix}{email}")
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class LoginLockout:
+    def __init__(
+        self,
+        backend: LockoutBackend,
+        threshold: int,
+        base_seconds: float,
+        max_seconds: float,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.threshold = threshold
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        # Wall-clock time, so deadlines mean the same thing in every process.
+        self.timer = timer
+
+    @property
+    def blocking(self) -> bool:
+        """
+        Whether backend calls do network I/O and must not run on the event loop.
+        """
+        return not isinstance(self.backend, MemoryLockoutBackend)
+
+    def retry_after(self, email: str) -> float:
+        """
+        Seconds until `email` may try again, or 0 if it is not locked.
+        """
+        locked_until = self.backend.locked_until(normalize_email(email))
+        return max(locked_until - self.timer(), 0.0)
+
+    def record_failure(self, email: str) -> None:
+        key = normalize_email(email)
+        try:
+            failures = self.backend.add_failure(key)
+            if failures < self.threshold:
+                return
+            delay = min(
+                self.base_seconds * 2 ** (failures - self.threshold),
+                self.max_seconds,
+            )
+            self.backend.lock(key, self.timer() + delay)
+        except Exception as e:
+            logger.warning("Failed to record login failure for %s: %s", key, e)
+            return
+        logger.warning(
+            "Locking out %s for %.0fs after %d failed logins", key, delay, failures
+        )
+
+    def reset(self, email: str) -> None:
+        try:
+            self.backend.delete(normalize_email(email))
+        except Exception as e:
+            logger.warning("Failed to reset login lockout for %s: %s", email, e)
+
+    async def record_failure_async(self, email: str) -> None:
+        if self.blocking:
+            await run_in_threadpool(self.record_failure, email)
+        else:
+            self.record_failure(email)
+
+    async def reset_async(self, email: str) -> None:
+        if self.blocking:
+            await run_in_threadpool(self.reset, email)
+        else:
+            self.reset(email)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+
+def build_lockout_backend() -> LockoutBackend:
+    # Entries are forgotten once they have been quiet for longer than the
+    # longest lockout.
+    ttl = settings.LOGIN_LOCKOUT_MAX_SECONDS * 2
+    storage = limiter.limiter.storage
+    if isinstance(storage, RedisStorage):
+        return RedisLockoutBackend(storage.get_connection(), ttl=ttl)
+
+    if not settings.RATE_LIMIT_STORAGE_URI.startswith("memory://"):
+        logger.warning(
+            "Login lockouts are kept per process with %s rate-limit storage",
+            type(storage).__name__,
+        )
+    return MemoryLockoutBackend(maxsize=100_000, ttl=ttl)
+
+
+login_lockout = LoginLockout(
+    build_lockout_backend(),
+    threshold=settings.LOGIN_LOCKOUT_THRESHOLD,
+    base_seconds=settings.LOGIN_LOCKOUT_BASE_SECONDS,
+    max_seconds=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+)
+
+account_limit = parse(settings.LOGIN_RATE_LIMIT_PER_ACCOUNT)
+
+
+def check_login_allowed(email: str) -> None:
+    """
+    Reject a login attempt for a locked or rate-limited account.
+
+    Raises TooManyLoginAttemptsError with a Retry-After hint.
+    """
+    try:
+        retry_after = login_lockout.retry_after(email)
+    except Exception as e:
+        # Same fail-open policy as the route limits.
+        if not settings.RATE_LIMIT_FAIL_OPEN:
+            raise
+        logger.warning("Login lockout storage unavailable: %s", e)
+        retry_after = 0.0
+    if retry_after > 0:
+        raise TooManyLoginAttemptsError(retry_after=int(retry_after) + 1)
+
+    try:
+        allowed = limiter.limiter.hit(account_limit, "login", normalize_email(email))
+    except Exception as e:
+        if not settings.RATE_LIMIT_FAIL_OPEN:
+            raise
+        logger.warning("Per-account login limit unavailable: %s", e)
+        return
+
+    if not allowed:
+        logger.warning("Per-account login rate limit exceeded for %s", email)
+        raise TooManyLoginAttemptsError(retry_after=int(account_limit.get_expiry()))
+
+
+async def check_login_allowed_async(email: str) -> None:
+    if login_lockout.blocking or not isinstance(limiter.limiter.storage, MemoryStorage):
+        await run_in_threadpool(check_login_allowed, email)
+    else:
+        check_login_allowed(email)
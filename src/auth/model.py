@@ -1,3 +1,6 @@
+from typing import Annotated, Literal
+
+from fastapi import Form
 from pydantic import BaseModel, EmailStr
 
 
@@ -13,10 +16,34 @@ class RegisterUserRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class TokenRequestForm:
+    """
+    OAuth2 token request supporting the `password` and `refresh_token` grants.
+    """
+
+    def __init__(
+        self,
+        grant_type: Annotated[
+            Literal["password", "refresh_token"], Form()
+        ] = "password",
+        username: Annotated[str, Form()] = "",
+        password: Annotated[str, Form(json_schema_extra={"format": "password"})] = "",
+        refresh_token: Annotated[str | None, Form()] = None,
+        scope: Annotated[str, Form()] = "",
+    ):
+        self.grant_type = grant_type
+        self.username = username
+        self.password = password
+        self.refresh_token = refresh_token
+        self.scopes = scope.split()
 
 
 class TokenData(BaseModel):
     user_id: int | None = None
+    family_id: str | None = None
 
     def get_user_id(self) -> int | None:
         if self.user_id:
@@ -0,0 +1,202 @@
+"""
+Refresh tokens with rotation, reuse detection and a revocation index.
+
+Each password login starts a token family. Redeeming a refresh token
+revokes it and issues its successor in the same family. Presenting an
+already-rotated token again means it leaked, so the whole family is
+revoked.
+
+Access tokens carry their family id in the `fam` claim. `verify_token`
+checks it against `revocation_index`, an in-memory set of revoked
+families. Revocations made in this process are added to it immediately.
+Revocations from other workers arrive through a periodic background
+refresh, so access-token checks never wait on the database.
+"""
+
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from src.database.core import SessionLocal
+from src.entities.refresh_token import RefreshToken
+from src.entities.user import User
+from src.exceptions import AuthenticationError
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    # Stored as naive UTC so comparisons behave the same on SQLite and Postgres.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user_id: int, family_id: str | None = None):
+    """
+    Create a refresh token for `user_id`, starting a new family if none is given.
+
+    Returns the raw token and its family id. The caller commits.
+    """
+    token = secrets.token_urlsafe(32)
+    family_id = family_id or secrets.token_hex(16)
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            family_id=family_id,
+            token_hash=hash_refresh_token(token),
+            expires_at=_utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return token, family_id
+
+
+def revoke_family(db: Session, family_id: str, reason: str) -> None:
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=_utcnow(), revoked_reason=reason)
+    )
+    revocation_index.add(family_id)
+
+
+def rotate_refresh_token(db: Session, token: str) -> tuple[User, str, str]:
+    """
+    Redeem `token` and return the user, the successor token and its family.
+
+    Raises AuthenticationError for unknown, expired or reused tokens; reuse
+    revokes the whole family. Commits the session.
+    """
+    record = db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(token))
+    )
+    now = _utcnow()
+
+    if record is None or record.expires_at <= now:
+        logger.warning("Refresh failed: unknown or expired refresh token")
+        raise AuthenticationError()
+
+    if record.revoked_at is not None:
+        if record.revoked_reason == "rotated":
+            _revoke_reused(db, record)
+        raise AuthenticationError()
+
+    user = db.get(User, record.user_id)
+    if user is None or user.disabled:
+        raise AuthenticationError()
+
+    # Claim the token in a single conditional UPDATE. A concurrent redemption
+    # that claimed it first leaves no row to update, which makes this a reuse.
+    claimed = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == record.id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=now, revoked_reason="rotated")
+    ).rowcount
+    if claimed == 0:
+        _revoke_reused(db, record)
+        raise AuthenticationError()
+
+    new_token, family_id = issue_refresh_token(db, user.id, record.family_id)
+    db.commit()
+    return user, new_token, family_id
+
+
+def _revoke_reused(db: Session, record: RefreshToken) -> None:
+    logger.warning(
+        "Refresh token reuse detected for user ID %s; revoking family %s",
+        record.user_id,
+        record.family_id,
+    )
+    revoke_family(db, record.family_id, "reuse")
+    db.commit()
+
+
+class RevocationIndex:
+    """
+    Set of revoked token families, refreshed from the database in the background.
+
+    Families only need tracking while access tokens minted for them can still
+    be valid, so the refresh loads revocations newer than the access-token
+    lifetime.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] | None,
+        refresh_seconds: float,
+        lookback: timedelta,
+    ):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self.lookback = lookback
+
+        self._revoked: frozenset[str] = frozenset()
+        # Local revocations are kept across refreshes for `lookback` so a
+        # refresh that read the database before our commit cannot drop them.
+        self._local: dict[str, float] = {}
+        self._refreshed_at = time.monotonic()
+        self._refreshing = threading.Lock()
+
+    def add(self, family_id: str) -> None:
+        self._local[family_id] = time.monotonic()
+        self._revoked = self._revoked | {family_id}
+
+    def is_revoked(self, family_id: str | None) -> bool:
+        if time.monotonic() - self._refreshed_at >= self.refresh_seconds:
+            self._refresh_in_background()
+        return family_id is not None and family_id in self._revoked
+
+    def refresh(self, db: Session) -> None:
+        cutoff = _utcnow() - self.lookback
+        families = db.scalars(
+            select(RefreshToken.family_id)
+            .where(
+                RefreshToken.revoked_reason.is_not(None),
+                RefreshToken.revoked_reason != "rotated",
+                RefreshToken.revoked_at >= cutoff,
+            )
+            .distinct()
+        ).all()
+        now = time.monotonic()
+        horizon = self.lookback.total_seconds()
+        self._local = {
+            family: added
+            for family, added in list(self._local.items())
+            if now - added < horizon
+        }
+        self._revoked = frozenset(families) | frozenset(self._local)
+        self._refreshed_at = now
+
+    def _refresh_in_background(self) -> None:
+        if self.session_factory is None or not self._refreshing.acquire(blocking=False):
+            return
+        # Push the deadline out so concurrent checks don't queue more refreshes.
+        self._refreshed_at = time.monotonic()
+
+        def run() -> None:
+            try:
+                with self.session_factory() as db:
+                    self.refresh(db)
+            except Exception as e:
+                logger.warning("Failed to refresh token revocation index: %s", e)
+            finally:
+                self._refreshing.release()
+
+        threading.Thread(target=run, name="revocation-refresh", daemon=True).start()
+
+
+revocation_index = RevocationIndex(
+    session_factory=SessionLocal,
+    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+    lookback=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+)
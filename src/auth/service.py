@@ -1,81 +1,253 @@
+import functools
+import hashlib
 import logging
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 import jwt
-from fastapi import Depends
+from fastapi import Depends, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt import PyJWTError
-from pwdlib import PasswordHash
+from prometheus_client import Counter
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session
 
+from src.cache import TTLCache
 from src.database.core import get_db
 from src.entities.user import User
-from src.exceptions import AuthenticationError
+from src.exceptions import (
+    AdminAccessError,
+    AuthenticationError,
+    EmailAlreadyRegisteredError,
+)
 from src.settings import settings
+from src.tracing import span
+from src.users.cache import user_cache
 
-from . import model
+from . import hashing, model
+from .keys import key_store
+from .lockout import (
+    check_login_allowed,
+    check_login_allowed_async,
+    login_lockout,
+    normalize_email,
+)
+from .refresh_tokens import issue_refresh_token, revocation_index, rotate_refresh_token
 
-ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+logger = logging.getLogger(__name__)
 
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-password_hash = PasswordHash.recommended()
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
 
+TOKEN_CACHE_REQUESTS = Counter(
+    "token_cache_requests_total",
+    "Verified-token cache lookups",
+    ["result"],
+)
+
+# Keyed by a SHA-256 digest of the raw token and expiring at the token's own
+# `exp` (wall clock), so a cached token is rejected at the same instant
+# jwt.decode would reject it.
+token_cache: TTLCache[bytes, model.TokenData] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAX_SIZE, ttl=0, timer=time.time
+)
+
 
 def verify_password(plain_password, hashed_password):
-    return password_hash.verify(plain_password, hashed_password)
+    return hashing.executor.run(hashing.check_password, plain_password, hashed_password)
 
 
 def get_password_hash(password):
-    return password_hash.hash(password)
+    return hashing.executor.run(hashing.hash_password, password)
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await hashing.executor.run_async(
+        hashing.check_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password):
+    return await hashing.executor.run_async(hashing.hash_password, password)
+
+
+def verify_and_update_password(plain_password, hashed_password):
+    return hashing.executor.run(
+        hashing.check_and_update_password, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    return await hashing.executor.run_async(
+        hashing.check_and_update_password, plain_password, hashed_password
+    )
+
+
+@functools.cache
+def dummy_password_hash() -> str:
+    """
+    A hash of a random password with the current Argon2 parameters.
+
+    Verified against when the email is unknown, so a miss costs the same as
+    a wrong password and response time does not reveal which emails exist.
+    """
+    return get_password_hash(secrets.token_urlsafe(16))
+
+
+def email_matches(email: str) -> ColumnElement[bool]:
+    """
+    Case-insensitive email filter served by the ix_users_email_lower index.
+    """
+    return func.lower(User.email) == normalize_email(email)
 
 
 def authenticate_user(email: str, password: str, db: Session) -> User | None:
-    user = db.query(User).filter(User.email == email).first()
+    user = db.scalar(select(User).where(email_matches(email)))
+    if not user:
+        verify_password(password, dummy_password_hash())
+        logger.warning("Authentication failed: user not found (%s)", email)
+        return None
+
+    valid, new_hash = verify_and_update_password(password, user.password_hash)
+    if not valid:
+        logger.warning("Authentication failed: incorrect password (%s)", email)
+        return None
+
+    if new_hash:
+        user.password_hash = new_hash
+        db.commit()
+        user_cache.invalidate(user.id)
+        logger.info("Rehashed password with current parameters (%s)", email)
+
+    return user
+
+
+async def authenticate_user_async(
+    email: str, password: str, db: AsyncSession
+) -> User | None:
+    user = await db.scalar(select(User).where(email_matches(email)))
     if not user:
-        logging.warning(f"Authentication failed: user not found ({email})")
+        await verify_password_async(password, dummy_password_hash())
+        logger.warning("Authentication failed: user not found (%s)", email)
         return None
 
-    if not verify_password(password, user.password_hash):
-        logging.warning(f"Authentication failed: incorrect password ({email})")
+    valid, new_hash = await verify_and_update_password_async(
+        password, user.password_hash
+    )
+    if not valid:
+        logger.warning("Authentication failed: incorrect password (%s)", email)
         return None
 
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+        await user_cache.invalidate_async(user.id)
+        logger.info("Rehashed password with current parameters (%s)", email)
+
     return user
 
 
-def create_access_token(email: str, user_id: int, expires_delta: timedelta) -> str:
+def create_access_token(
+    email: str,
+    user_id: int,
+    expires_delta: timedelta,
+    family_id: str | None = None,
+) -> str:
     encode = {
         "sub": email,
         "id": str(user_id),
         "exp": datetime.now(timezone.utc) + expires_delta,
     }
-    return jwt.encode(encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    if family_id:
+        encode["fam"] = family_id
+    key_set = key_store.get()
+    headers = {"kid": key_set.signing_kid} if key_set.signing_kid else None
+    with span("jwt.encode", {"jwt.algorithm": key_set.algorithm}):
+        return jwt.encode(
+            encode, key_set.signing_key, algorithm=key_set.algorithm, headers=headers
+        )
 
 
 def verify_token(token: str) -> model.TokenData:
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(cache_key)
+    if cached is not None:
+        TOKEN_CACHE_REQUESTS.labels("hit").inc()
+        if revocation_index.is_revoked(cached.family_id):
+            raise AuthenticationError("Token has been revoked")
+        return cached
+    TOKEN_CACHE_REQUESTS.labels("miss").inc()
+
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=ALGORITHM)
+        key_set = key_store.get()
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = key_set.verification_key(kid)
+        if key is None:
+            logger.warning("Token signed with unknown key id: %s", kid)
+            raise AuthenticationError()
+        with span("jwt.decode", {"jwt.algorithm": key_set.algorithm}):
+            payload = jwt.decode(token, key, algorithms=[key_set.algorithm])
 
         user_id = payload.get("id")
         if not user_id:
-            logging.warning(f"Invalid token - missing user id")
+            logger.warning("Invalid token - missing user id")
             raise AuthenticationError("Invalid token: missing user id")
 
-        return model.TokenData(user_id=user_id)
+        token_data = model.TokenData(user_id=user_id, family_id=payload.get("fam"))
 
     except PyJWTError as e:
-        logging.warning(f"Token verification failed: {str(e)}")
+        logger.warning("Token verification failed: %s", e)
         raise AuthenticationError()
 
+    if "exp" in payload:
+        token_cache.set(cache_key, token_data, expires_at=float(payload["exp"]))
+    if revocation_index.is_revoked(token_data.family_id):
+        raise AuthenticationError("Token has been revoked")
+    return token_data
+
+
+def get_jwks() -> dict:
+    """
+    Public keys for verifying our tokens, in JWKS format.
+    """
+    return key_store.get().jwks()
+
+
+def warm_up() -> None:
+    """
+    Load the JWT keys, run a sign/verify round trip and build the dummy
+    hash, so neither the crypto backends nor the hashing pool are
+    initialised by the first real request.
+    """
+    key_set = key_store.get()
+    token = create_access_token("warm-up", 0, timedelta(minutes=1))
+    jwt.decode(
+        token,
+        key_set.verification_key(key_set.signing_kid),
+        algorithms=[key_set.algorithm],
+    )
+    dummy_password_hash()
+
 
 def register_user(
     db: Session, register_user_request: model.RegisterUserRequest
 ) -> None:
     """
     Registers a new user in the database.
+
+    A taken email is rejected before the password is hashed, so conflicting
+    registrations (typically client retries) fail without the Argon2 cost.
     """
+    existing = db.scalar(
+        select(User.id).where(email_matches(register_user_request.email))
+    )
+    if existing is not None:
+        raise EmailAlreadyRegisteredError()
     try:
         new_user = User(
             email=register_user_request.email,
@@ -87,11 +259,49 @@ def register_user(
         )
         db.add(new_user)
         db.commit()
+    except IntegrityError:
+        # A concurrent registration of the same email committed first.
+        db.rollback()
+        raise EmailAlreadyRegisteredError()
     except Exception as e:
-        logging.error(
-            f"Failed to register user: {register_user_request.email}, Error: {str(e)}"
+        logger.error(
+            "Failed to register user: %s, Error: %s", register_user_request.email, e
         )
         raise
+    user_cache.invalidate(new_user.id)
+
+
+async def register_user_async(
+    db: AsyncSession, register_user_request: model.RegisterUserRequest
+) -> None:
+    """
+    Registers a new user through the async database layer.
+    """
+    existing = await db.scalar(
+        select(User.id).where(email_matches(register_user_request.email))
+    )
+    if existing is not None:
+        raise EmailAlreadyRegisteredError()
+    try:
+        new_user = User(
+            email=register_user_request.email,
+            first_name=register_user_request.first_name,
+            last_name=register_user_request.last_name,
+            password_hash=await get_password_hash_async(register_user_request.password),
+            image_url=register_user_request.image_url,
+            disabled=False,
+        )
+        db.add(new_user)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise EmailAlreadyRegisteredError()
+    except Exception as e:
+        logger.error(
+            "Failed to register user: %s, Error: %s", register_user_request.email, e
+        )
+        raise
+    await user_cache.invalidate_async(new_user.id)
 
 
 def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]) -> model.TokenData:
@@ -101,25 +311,89 @@ def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]) -> model.Tok
 CurrentUser = Annotated[model.TokenData, Depends(get_current_user)]
 
 
+def require_admin(x_admin_key: Annotated[str | None, Header()] = None) -> None:
+    if not (
+        settings.ADMIN_API_KEY
+        and x_admin_key
+        and secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY)
+    ):
+        raise AdminAccessError()
+
+
+AdminAccess = Annotated[None, Depends(require_admin)]
+
+
 def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: Session = Depends(get_db),
 ) -> model.Token:
     """
-    Authenticate user and return JWT access token.
+    Authenticate user and return JWT access and refresh tokens.
     """
+    check_login_allowed(form_data.username)
     user = authenticate_user(form_data.username, form_data.password, db)
 
     if not user:
+        login_lockout.record_failure(form_data.username)
         raise AuthenticationError()
 
+    login_lockout.reset(form_data.username)
+
+    return _issue_tokens(db, user)
+
+
+async def login_for_access_token_async(
+    form_data: OAuth2PasswordRequestForm, db: AsyncSession
+) -> model.Token:
+    """
+    Async counterpart of login_for_access_token.
+    """
+    await check_login_allowed_async(form_data.username)
+    user = await authenticate_user_async(form_data.username, form_data.password, db)
+
+    if not user:
+        await login_lockout.record_failure_async(form_data.username)
+        raise AuthenticationError()
+
+    await login_lockout.reset_async(form_data.username)
+
+    return await db.run_sync(_issue_tokens, user)
+
+
+def refresh_access_token(refresh_token: str | None, db: Session) -> model.Token:
+    """
+    Exchange a refresh token for a new access token and a rotated refresh token.
+    """
+    if not refresh_token:
+        raise AuthenticationError()
+
+    user, new_refresh_token, family_id = rotate_refresh_token(db, refresh_token)
+    return _build_token(user, new_refresh_token, family_id)
+
+
+async def refresh_access_token_async(
+    refresh_token: str | None, db: AsyncSession
+) -> model.Token:
+    return await db.run_sync(
+        lambda sync_db: refresh_access_token(refresh_token, sync_db)
+    )
+
+
+def _issue_tokens(db: Session, user: User) -> model.Token:
+    refresh_token, family_id = issue_refresh_token(db, user.id)
+    db.commit()
+    return _build_token(user, refresh_token, family_id)
+
+
+def _build_token(user: User, refresh_token: str, family_id: str) -> model.Token:
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     access_token = create_access_token(
-        user.email, user.id, expires_delta=access_token_expires
+        user.email, user.id, expires_delta=access_token_expires, family_id=family_id
     )
 
     return model.Token(
         access_token=access_token,
         token_type="bearer",
+        refresh_token=refresh_token,
     )
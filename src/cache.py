@@ -0,0 +1,77 @@
+"""
+Small in-process caching primitives shared by the service modules.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Entries are evicted least-recently-used first once `maxsize` is reached,
+    and lazily dropped on lookup once their deadline has passed. An entry is
+    considered expired from its deadline onwards (`now >= expires_at`).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self.timer() >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(
+        self,
+        key: K,
+        value: V,
+        ttl: float | None = None,
+        expires_at: float | None = None,
+    ) -> None:
+        """
+        Store `value`, expiring after `ttl` seconds or at the absolute
+        `expires_at` timestamp (measured with `timer`), whichever is given.
+        """
+        if self.maxsize <= 0:
+            return
+        if expires_at is None:
+            expires_at = self.timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
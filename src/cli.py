@@ -0,0 +1,89 @@
+"""
+Administrative command line.
+
+Usage:
+    python -m src.cli import-users users.ndjson
+    python -m src.cli import-users users.csv --format csv
+    python -m src.cli export-users users.ndjson.gz --gzip
+"""
+
+import sys
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from src.database.core import SessionLocal
+from src.settings import settings
+from src.users.exporter import ExportFormat, export_users
+from src.users.importer import ImportFormat, UserImporter, get_import_executor
+
+app = typer.Typer(help="Administrative commands for the API.")
+
+
+@app.callback()
+def main() -> None:
+    """
+    Administrative commands for the API.
+    """
+
+
+@app.command("import-users")
+def import_users(
+    path: Annotated[Path, typer.Argument(help="Input file, or '-' for stdin.")],
+    format: Annotated[str, typer.Option(help="ndjson or csv")] = "ndjson",
+    batch_size: Annotated[
+        int, typer.Option(help="Rows per INSERT.")
+    ] = settings.BULK_IMPORT_BATCH_SIZE,
+) -> None:
+    """
+    Bulk-create users, printing a JSON report of inserted rows and errors.
+    """
+    if format not in ("ndjson", "csv"):
+        raise typer.BadParameter("format must be 'ndjson' or 'csv'")
+    fmt: ImportFormat = format  # type: ignore[assignment]
+
+    with SessionLocal() as db:
+        importer = UserImporter(db, fmt, get_import_executor(), batch_size=batch_size)
+        if str(path) == "-":
+            importer.add_lines(line.rstrip("\n") for line in sys.stdin)
+        else:
+            with path.open(encoding="utf-8", newline="") as source:
+                importer.add_lines(line.rstrip("\r\n") for line in source)
+        report = importer.finish()
+
+    typer.echo(report.model_dump_json(indent=2))
+    if report.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command("export-users")
+def export_users_command(
+    path: Annotated[Path, typer.Argument(help="Output file, or '-' for stdout.")],
+    format: Annotated[str, typer.Option(help="ndjson or csv")] = "ndjson",
+    gzip: Annotated[bool, typer.Option(help="Gzip the output.")] = False,
+    batch_size: Annotated[
+        int, typer.Option(help="Rows per fetch.")
+    ] = settings.BULK_EXPORT_BATCH_SIZE,
+) -> None:
+    """
+    Stream the users table to a file with constant memory.
+    """
+    if format not in ("ndjson", "csv"):
+        raise typer.BadParameter("format must be 'ndjson' or 'csv'")
+    fmt: ExportFormat = format  # type: ignore[assignment]
+
+    with SessionLocal() as db:
+        chunks = export_users(db, fmt, gzip=gzip, batch_size=batch_size)
+        if str(path) == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+        else:
+            with path.open("wb") as target:
+                for chunk in chunks:
+                    target.write(chunk)
+
+
+if __name__ == "__main__":
+    app()
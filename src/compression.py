@@ -0,0 +1,172 @@
+"""
+Response compression.
+
+Negotiates brotli or gzip from Accept-Encoding (brotli preferred) and
+compresses responses of at least COMPRESSION_MINIMUM_SIZE bytes, streamed
+ones included. Responses that already carry a Content-Encoding or are
+compressed archives (e.g. the gzip user export) are passed through.
+"""
+
+import zlib
+from typing import Callable, Protocol
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.settings import settings
+
+PRECOMPRESSED_CONTENT_TYPES = ("application/gzip", "application/zip")
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """
+    Codings the client accepts, ignoring any listed with q=0.
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(coding.strip())
+    return accepted
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes:
+        """
+        End the stream and return whatever is still buffered.
+        """
+        ...
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+def gzip_compressor(level: int) -> Compressor:
+    # wbits=31 writes the gzip header and trailer around the deflate stream.
+    return zlib.compressobj(level, zlib.DEFLATED, 31)
+
+
+class CompressionResponder:
+    """
+    Compresses one response with a fresh compressor.
+
+    The start message is held back until the first body message shows whether
+    the response is worth compressing, since compression changes its headers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        content_encoding: str,
+        compressor: Callable[[], Compressor],
+        minimum_size: int,
+    ) -> None:
+        self.app = app
+        self.content_encoding = content_encoding
+        self.compressor = compressor
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        start: Message | None = None
+        compressor: Compressor | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                # Already started: compress the rest of the stream, or pass
+                # it through if the first chunk decided against compression.
+                if compressor is not None and message["type"] == "http.response.body":
+                    body = compressor.compress(message.get("body", b""))
+                    if not message.get("more_body", False):
+                        body += compressor.flush()
+                    message = {**message, "body": body}
+                await send(message)
+                return
+
+            initial, start = start, None
+            if message["type"] == "http.response.body" and self._should_compress(
+                initial, message
+            ):
+                compressor = self.compressor()
+                body = compressor.compress(message.get("body", b""))
+                more_body = message.get("more_body", False)
+                headers = MutableHeaders(raw=initial["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                headers["Content-Encoding"] = self.content_encoding
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body += compressor.flush()
+                    headers["Content-Length"] = str(len(body))
+                message = {**message, "body": body}
+            await send(initial)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
+
+    def _should_compress(self, start: Message, message: Message) -> bool:
+        headers = Headers(raw=start["headers"])
+        if "content-encoding" in headers or headers.get("content-type", "").startswith(
+            PRECOMPRESSED_CONTENT_TYPES
+        ):
+            return False
+        body = message.get("body", b"")
+        return len(body) >= self.minimum_size or message.get("more_body", False)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level: int = settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = settings.COMPRESSION_BROTLI_QUALITY,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if "br" in accepted:
+            responder = CompressionResponder(
+                self.app,
+                "br",
+                lambda: BrotliCompressor(self.brotli_quality),
+                self.minimum_size,
+            )
+        elif "gzip" in accepted:
+            responder = CompressionResponder(
+                self.app,
+                "gzip",
+                lambda: gzip_compressor(self.gzip_level),
+                self.minimum_size,
+            )
+        else:
+            await self.app(scope, receive, send)
+            return
+        await responder(scope, receive, send)
@@ -1,14 +1,36 @@
-from typing import Annotated, Generator
+from typing import Annotated, AsyncGenerator, Generator
 
 from fastapi import Depends
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+from ..metrics import track_queries
 from ..settings import settings
+from .pool import engine_options, instrument_pool
+from .replicas import RoutingSession, replica_set
 
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+instrument_pool(engine)
+track_queries(engine)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine
+)
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
 
 
 class Base(DeclarativeBase):
@@ -30,3 +52,115 @@ def get_db() -> Generator[Session, None, None]:
 
 
 DbSession = Annotated[Session, Depends(get_db)]
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap the sync driver in a database URL for its asyncio counterpart.
+    """
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Return the process-wide AsyncEngine, creating it on first use.
+
+    The engine is built lazily so deployments that never enable async
+    routes do not need an asyncio driver installed.
+    """
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is None:
+        url = settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL)
+        _async_engine = create_async_engine(
+            url, **engine_options(url, name="primary_async", is_async=True)
+        )
+        instrument_pool(_async_engine.sync_engine)
+        track_queries(_async_engine.sync_engine)
+        _AsyncSessionLocal = async_sessionmaker(
+            bind=_async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    if _AsyncSessionLocal is None:
+        get_async_engine()
+    return _AsyncSessionLocal
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield an AsyncSession for FastAPI dependencies.
+
+    Usage:
+        db: AsyncSession = Depends(get_async_db)
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+AsyncDbSession = Annotated[AsyncSession, Depends(get_async_db)]
+
+
+def warm_up_pool(connections: int = settings.DB_WARMUP_CONNECTIONS) -> None:
+    """
+    Open up to `connections` pooled connections and run a health query on
+    each, so the first requests after start-up don't pay for connecting.
+
+    Raises if the database is unreachable.
+    """
+    held = []
+    try:
+        for _ in range(min(connections, settings.DB_POOL_SIZE)):
+            conn = engine.connect()
+            held.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in held:
+            conn.close()
+
+
+async def warm_up_async_pool(connections: int = settings.DB_WARMUP_CONNECTIONS) -> None:
+    """
+    Async counterpart of `warm_up_pool` for the async engine.
+    """
+    held = []
+    try:
+        for _ in range(min(connections, settings.DB_POOL_SIZE)):
+            conn = await get_async_engine().connect()
+            held.append(conn)
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in held:
+            await conn.close()
+
+
+async def dispose_engines() -> None:
+    """
+    Close every pooled connection; used on shutdown.
+    """
+    for sync_engine in [engine, *replica_set.engines]:
+        sync_engine.dispose()
+    if _async_engine is not None:
+        await _async_engine.dispose()
+
+
+def dispose_engines_after_fork() -> None:
+    """
+    Drop pooled connections inherited from a parent process.
+
+    Call in each forked worker before it touches the database; the parent
+    keeps using (and eventually closes) the originals.
+    """
+    for sync_engine in [engine, *replica_set.engines]:
+        sync_engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+
+
+def use_async_db(route: str) -> bool:
+    """
+    Whether `route` (e.g. "users.me") should be served by the async database layer.
+    """
+    return route in settings.ASYNC_DB_ROUTES
@@ -0,0 +1,166 @@
+"""
+Connection pool configuration and instrumentation.
+
+Builds the engine keyword arguments from Settings and exports pool
+metrics (checked-out connections, overflow, checkout wait time, connection
+churn) through prometheus_client. Checkouts that wait longer than
+DB_POOL_SLOW_CHECKOUT_MS are logged as warnings.
+"""
+
+import logging
+import time
+from typing import Any
+
+from prometheus_client import Counter, Gauge, Histogram
+from sqlalchemy import event
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from ..settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Set from pool events rather than read on scrape, so multiprocess mode
+# (which ignores set_function) sums every worker's live value.
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections",
+    "Connections opened beyond pool_size",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that failed because the pool was exhausted",
+    ["pool"],
+)
+POOL_CONNECTIONS_CREATED = Counter(
+    "db_pool_connections_created_total",
+    "New DBAPI connections opened by the pool",
+    ["pool"],
+)
+POOL_CONNECTIONS_INVALIDATED = Counter(
+    "db_pool_connections_invalidated_total",
+    "Pooled connections discarded as invalid",
+    ["pool"],
+)
+
+
+class _TimedCheckoutMixin:
+    """
+    Records how long `connect()` takes to hand out a connection.
+
+    The pool's `logging_name` (set via `pool_logging_name`) labels the metrics.
+    """
+
+    def connect(self):
+        name = self.logging_name or "primary"
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except sa_exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(name).inc()
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            POOL_CHECKOUT_WAIT.labels(name).observe(waited)
+            if waited * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+                logger.warning(
+                    "Slow connection checkout from '%s' pool: waited %.1f ms "
+                    "(checked out: %d, overflow: %d)",
+                    name,
+                    waited * 1000,
+                    self.checkedout(),
+                    self.overflow(),
+                )
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(
+    url: str, name: str = "primary", is_async: bool = False
+) -> dict[str, Any]:
+    """
+    Keyword arguments for create_engine/create_async_engine built from Settings.
+    """
+    backend = make_url(url).get_backend_name()
+    options: dict[str, Any] = {
+        "pool_logging_name": name,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+    if backend == "sqlite":
+        # SQLite picks its own pool class; sizing options do not apply.
+        return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+    )
+
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        options["connect_args"] = (
+            {"server_settings": {"statement_timeout": timeout}}
+            if is_async
+            else {"options": f"-c statement_timeout={timeout}"}
+        )
+
+    return options
+
+
+def instrument_pool(engine: Engine) -> None:
+    """
+    Export gauges for `engine`'s pool and hook its connect/invalidate events.
+    """
+    name = engine.pool.logging_name or "primary"
+
+    if isinstance(engine.pool, QueuePool):
+        checked_out = POOL_CHECKED_OUT.labels(name)
+        overflow = POOL_OVERFLOW.labels(name)
+
+        # Checkins are only counted for connections whose checkout was, since
+        # a failed checkout also checks its connection record back in.
+        def on_checkout(dbapi_connection, record, proxy) -> None:
+            record.record_info["checked_out"] = True
+            checked_out.inc()
+            overflow.set(max(engine.pool.overflow(), 0))
+
+        def on_checkin(dbapi_connection, record) -> None:
+            if record.record_info.pop("checked_out", False):
+                checked_out.dec()
+            # Fired before the pool takes the connection back, which closes it
+            # (ending one overflow connection) when the idle queue is full.
+            pool = engine.pool
+            returning_overflow = pool.checkedin() >= pool.size()
+            overflow.set(max(pool.overflow() - returning_overflow, 0))
+
+        # Listeners carry over to the new pool on engine.dispose().
+        event.listen(engine.pool, "checkout", on_checkout)
+        event.listen(engine.pool, "checkin", on_checkin)
+
+    created = POOL_CONNECTIONS_CREATED.labels(name)
+    invalidated = POOL_CONNECTIONS_INVALIDATED.labels(name)
+    event.listen(engine.pool, "connect", lambda *_args: created.inc())
+    event.listen(engine.pool, "invalidate", lambda *_args: invalidated.inc())
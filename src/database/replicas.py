@@ -0,0 +1,257 @@
+"""
+Read-replica routing.
+
+Sessions from `SessionLocal` are `RoutingSession`s. Inside a `replica(db)`
+block their reads go to one of the DATABASE_REPLICA_URLS, picked round-robin;
+flushes and anything outside the block still go to the primary.
+
+A replica that drops its connection or cannot be connected to is ejected
+for REPLICA_EJECT_SECONDS, and `run_on_replica` retries the call on the
+primary. Other errors, such as statement or lock timeouts, are raised
+without ejecting the replica.
+
+After `mark_write(user_id)`, reads for that user stay on the primary for
+READ_YOUR_WRITES_SECONDS so replication lag never shows a user stale data
+they just changed. With READ_YOUR_WRITES_BACKEND=redis the window is shared
+by every worker and pod; the memory backend only covers the worker that
+made the write.
+"""
+
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Protocol, TypeVar
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.cache import TTLCache
+from src.metrics import track_queries
+from src.settings import settings
+
+from .pool import engine_options, instrument_pool
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REPLICA_KEY = "replica"
+
+
+class ReplicaSet:
+    """
+    Round-robin over replica engines, skipping ones that recently failed.
+    """
+
+    def __init__(self, engines: list[Engine], eject_seconds: float):
+        self.engines = engines
+        self.eject_seconds = eject_seconds
+
+        self._ejected_until: dict[Engine, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+        for engine in engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    @classmethod
+    def from_urls(cls, urls: list[str], eject_seconds: float) -> "ReplicaSet":
+        engines = []
+        for i, url in enumerate(urls):
+            engine = create_engine(url, **engine_options(url, name=f"replica{i}"))
+            instrument_pool(engine)
+            track_queries(engine)
+            engines.append(engine)
+        return cls(engines, eject_seconds)
+
+    def choose(self) -> Engine | None:
+        """
+        Return the next healthy replica, or None if there is none.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for _ in range(len(self.engines)):
+                engine = self.engines[next(self._counter) % len(self.engines)]
+                if self._ejected_until.get(engine, 0.0) <= now:
+                    return engine
+        return None
+
+    def eject(self, engine: Engine) -> None:
+        with self._lock:
+            self._ejected_until[engine] = time.monotonic() + self.eject_seconds
+        logger.warning(
+            "Ejecting read replica %s for %.0fs",
+            engine.pool.logging_name,
+            self.eject_seconds,
+        )
+
+    def is_ejected(self, engine: Engine) -> bool:
+        return self._ejected_until.get(engine, 0.0) > time.monotonic()
+
+    def _on_error(self, context: ExceptionContext) -> None:
+        # No connection means connecting failed. Anything else, e.g. a
+        # statement timeout, says nothing about the replica's health.
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+
+replica_set = ReplicaSet.from_urls(
+    settings.DATABASE_REPLICA_URLS, settings.REPLICA_EJECT_SECONDS
+)
+
+
+class WritePins(Protocol):
+    def pin(self, user_id: int) -> None: ...
+
+    def is_pinned(self, user_id: int) -> bool: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryWritePins:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[int, bool] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def pin(self, user_id: int) -> None:
+        self._cache.set(user_id, True)
+
+    def is_pinned(self, user_id: int) -> bool:
+        return self._cache.get(user_id) is not None
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisWritePins:
+    """
+    Keeps pins as expiring keys in any client exposing the redis-py
+    `get`/`set(ex=...)`/`delete`/`scan_iter` methods.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "write-pin:"):
+        self.client = client
+        self.ttl = max(math.ceil(ttl), 1)
+        self.prefix = prefix
+
+    def pin(self, user_id: int) -> None:
+        self.client.set(f"{self.prefix}{user_id}", b"1", ex=self.ttl)
+
+    def is_pinned(self, user_id: int) -> bool:
+        return self.client.get(f"{self.prefix}{user_id}") is not None
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+def build_write_pins() -> WritePins:
+    if settings.READ_YOUR_WRITES_BACKEND == "redis":
+        import redis
+
+        return RedisWritePins(
+            redis.Redis.from_url(settings.REDIS_URL),
+            ttl=settings.READ_YOUR_WRITES_SECONDS,
+        )
+    return MemoryWritePins(maxsize=100_000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+# Users whose reads must stay on the primary.
+write_pins = build_write_pins()
+
+
+def mark_write(user_id: int) -> None:
+    """
+    Pin `user_id`'s reads to the primary for the read-your-writes window.
+    """
+    if settings.READ_YOUR_WRITES_SECONDS <= 0:
+        return
+    try:
+        write_pins.pin(user_id)
+    except Exception as e:
+        logger.error(
+            "Failed to pin reads to the primary for user ID %s: %s", user_id, e
+        )
+
+
+async def mark_write_async(user_id: int) -> None:
+    """
+    mark_write for async code, run in a thread when the pins live in redis.
+    """
+    if isinstance(write_pins, MemoryWritePins):
+        mark_write(user_id)
+    else:
+        await run_in_threadpool(mark_write, user_id)
+
+
+def wrote_recently(user_id: int) -> bool:
+    try:
+        return write_pins.is_pinned(user_id)
+    except Exception as e:
+        # Reading the primary is always consistent, so err towards it.
+        logger.warning("Write pin lookup failed for user ID %s: %s", user_id, e)
+        return True
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to the replica chosen by an enclosing `replica()`.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        engine = self.info.get(REPLICA_KEY)
+        if engine is not None and not self._flushing:
+            return engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@contextmanager
+def replica(db: Session, user_id: int | None = None) -> Iterator[Engine | None]:
+    """
+    Route `db`'s reads to a replica for the duration of the block.
+
+    Falls back to the primary when no replica is healthy, when `user_id`
+    wrote recently, or when `db` is not a RoutingSession. Yields the chosen
+    engine, or None for the primary.
+    """
+    engine = None
+    if (
+        isinstance(db, RoutingSession)
+        and REPLICA_KEY not in db.info
+        and (user_id is None or not wrote_recently(user_id))
+    ):
+        engine = replica_set.choose()
+
+    if engine is None:
+        yield None
+        return
+
+    db.info[REPLICA_KEY] = engine
+    try:
+        yield engine
+    finally:
+        del db.info[REPLICA_KEY]
+
+
+def run_on_replica(db: Session, fn: Callable[[], T], user_id: int | None = None) -> T:
+    """
+    Run the read-only callable `fn` against a replica.
+
+    If the replica failed at the connection level it has already been
+    ejected; the session is rolled back and `fn` retried on the primary, so
+    only call this without pending writes on `db`. Other errors are raised.
+    """
+    with replica(db, user_id) as engine:
+        try:
+            return fn()
+        except DBAPIError as e:
+            if engine is None or not replica_set.is_ejected(engine):
+                raise
+            logger.warning("Read replica failed, retrying on primary: %s", e)
+    db.rollback()
+    return fn()
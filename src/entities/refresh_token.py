@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database.core import Base
+
+
+class RefreshToken(Base):
+    """
+    A single refresh token. Tokens rotated from one login share a family_id.
+
+    Only a SHA-256 digest of the token is stored.
+    """
+
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (Index("ix_refresh_tokens_user_family", "user_id", "family_id"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    family_id: Mapped[str] = mapped_column(String(32), nullable=False, index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
+
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # "rotated" when replaced by its successor, "reuse" when the whole
+    # family was revoked because a rotated token was presented again.
+    revoked_reason: Mapped[str | None] = mapped_column(String(20), nullable=True)
+
+    def __repr__(self) -> str:
+        return (
+            f"<RefreshToken(id={self.id}, user_id={self.user_id}, "
+            f"family_id={self.family_id}, revoked_reason={self.revoked_reason})>"
+        )
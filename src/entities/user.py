@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..database.core import Base
@@ -12,6 +12,10 @@ class User(Base):
     """
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination of the user listing and created_at range filters.
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     first_name: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -48,3 +52,24 @@ class User(Base):
             f"<User(id={self.id}, email={self.email}, "
             f"first_name={self.first_name}, last_name={self.last_name})>"
         )
+
+
+# Listing active users, which is what almost every listing asks for. Queries
+# must spell the filter as `User.disabled.is_(False)` to match the predicate.
+Index(
+    "ix_users_active_created_at_id",
+    User.created_at,
+    User.id,
+    postgresql_where=User.disabled.is_(False),
+    sqlite_where=User.disabled.is_(False),
+)
+
+# Emails are unique and looked up case-insensitively.
+Index("ix_users_email_lower", func.lower(User.email), unique=True)
+
+# Case-insensitive email prefix filters need pattern ops under non-C collations.
+Index(
+    "ix_users_email_lower_pattern",
+    func.lower(User.email).label("lower_email"),
+    postgresql_ops={"lower_email": "varchar_pattern_ops"},
+).ddl_if(dialect="postgresql")
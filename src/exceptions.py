@@ -29,6 +29,14 @@ class InactiveUserError(UserError):
         )
 
 
+class EmailAlreadyRegisteredError(UserError):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already registered",
+        )
+
+
 class PasswordMismatchError(UserError):
     def __init__(self):
         super().__init__(
@@ -52,3 +60,41 @@ class AuthenticationError(HTTPException):
             detail=message,
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+class ServiceUnavailableError(HTTPException):
+    def __init__(
+        self,
+        message: str = "Service temporarily unavailable",
+        retry_after: int = 1,
+    ):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=message,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class TooManyLoginAttemptsError(HTTPException):
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AdminAccessError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+
+class InvalidCursorError(HTTPException):
+    def __init__(self):
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor",
+        )
@@ -0,0 +1,157 @@
+"""
+Liveness and readiness probes.
+
+`/healthz` answers from the process alone and does no I/O. `/readyz`
+reports whether the primary database answers and its connection pool
+still has room. Its result is cached for READINESS_CACHE_SECONDS and only
+one caller refreshes it at a time, so however many probes arrive the
+database sees at most one health query per interval per process.
+
+Once SIGTERM arrives readiness fails for SHUTDOWN_DRAIN_SECONDS before
+the server begins its graceful shutdown, giving load balancers time to
+stop routing to the process while it still serves.
+"""
+
+import asyncio
+import logging
+import signal
+import threading
+import time
+from typing import Any, Callable
+
+from fastapi import APIRouter, status
+from sqlalchemy import Engine, text
+
+from src.database.core import engine
+from src.responses import ORJSONResponse
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Checks = dict[str, str]
+
+
+class ReadinessProbe:
+    def __init__(
+        self,
+        engine: Engine,
+        cache_seconds: float,
+        pool_capacity: int,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.engine = engine
+        self.cache_seconds = cache_seconds
+        self.pool_capacity = pool_capacity
+        self.timer = timer
+        self.draining = False
+
+        self._result: tuple[bool, Checks] | None = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def check(self) -> tuple[bool, Checks]:
+        """
+        Return (ready, per-dependency results), probing at most once per
+        cache interval.
+        """
+        if self.draining:
+            return False, {"shutdown": "draining"}
+
+        result = self._result
+        if result is not None and self.timer() < self._expires_at:
+            return result
+        # Someone else is already probing; answer with the previous result
+        # rather than queueing behind them.
+        if not self._lock.acquire(blocking=result is None):
+            return result
+        try:
+            if self._result is None or self.timer() >= self._expires_at:
+                self._result = self._probe()
+                self._expires_at = self.timer() + self.cache_seconds
+            return self._result
+        finally:
+            self._lock.release()
+
+    def _probe(self) -> tuple[bool, Checks]:
+        checks: Checks = {}
+
+        checked_out = self.engine.pool.checkedout()
+        if self.pool_capacity >= 0 and checked_out >= self.pool_capacity:
+            # A health query would only wait for a connection.
+            checks["pool"] = f"saturated ({checked_out}/{self.pool_capacity})"
+            return False, checks
+        checks["pool"] = "ok"
+
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            checks["database"] = "ok"
+        except Exception as e:
+            logger.warning("Readiness database check failed: %s", e)
+            checks["database"] = "unreachable"
+        return all(value == "ok" for value in checks.values()), checks
+
+    def clear(self) -> None:
+        self._result = None
+        self.draining = False
+
+
+readiness = ReadinessProbe(
+    engine,
+    cache_seconds=settings.READINESS_CACHE_SECONDS,
+    pool_capacity=(
+        settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+        if settings.DB_MAX_OVERFLOW >= 0
+        else -1
+    ),
+)
+
+
+def drain_on_sigterm(
+    probe: ReadinessProbe = readiness,
+    delay: float = settings.SHUTDOWN_DRAIN_SECONDS,
+) -> None:
+    """
+    Make SIGTERM fail readiness first and pass the signal on to the
+    server's own handler `delay` seconds later. A second SIGTERM is passed
+    on immediately.
+
+    Call from the running event loop in the main thread after the server
+    has installed its handlers, i.e. during lifespan startup.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    previous = signal.getsignal(signal.SIGTERM)
+    if not callable(previous):
+        return
+    loop = asyncio.get_running_loop()
+
+    def handle(signum: int, frame: Any) -> None:
+        if probe.draining or delay <= 0:
+            probe.draining = True
+            previous(signum, frame)
+            return
+        probe.draining = True
+        logger.info("SIGTERM received, draining for %.0fs before shutdown", delay)
+        loop.call_soon_threadsafe(loop.call_later, delay, previous, signum, frame)
+
+    signal.signal(signal.SIGTERM, handle)
+
+
+router = APIRouter(tags=["Health"])
+
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz() -> ORJSONResponse:
+    return ORJSONResponse({"status": "ok"})
+
+
+@router.get("/readyz", include_in_schema=False)
+def readyz() -> ORJSONResponse:
+    ready, checks = readiness.check()
+    return ORJSONResponse(
+        {"status": "ready" if ready else "unavailable", "checks": checks},
+        status_code=(
+            status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+    )
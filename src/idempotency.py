@@ -0,0 +1,389 @@
+"""
+Idempotency keys for POST requests.
+
+A client that may retry a POST (e.g. after a timeout) sends the same
+`Idempotency-Key` header with each attempt. The first attempt runs and its
+response is stored for IDEMPOTENCY_TTL_SECONDS; later attempts get that
+response replayed, marked with `Idempotent-Replayed: true`, without
+reaching the endpoint. While the first attempt is still running, retries
+get a 409. Reusing a key with a different query string or body is rejected
+with a 422.
+
+Keys are scoped to the method, path and Authorization header. Server
+errors, 429s and `Cache-Control: no-store` responses (issued tokens) are
+not stored, so those requests can be retried with the same key.
+
+The memory backend is per process. Behind several workers or pods use the
+redis backend, otherwise a retry that lands on another process runs again.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Protocol
+
+from prometheus_client import Counter
+from pydantic import BaseModel, ConfigDict
+from starlette import status
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.cache import TTLCache
+from src.responses import ORJSONResponse
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "Requests carrying an Idempotency-Key",
+    ["result"],
+)
+
+# Printable ASCII without spaces, as UUIDs and similar random keys are.
+VALID_KEY = re.compile(r"[\x21-\x7e]{1,255}")
+
+
+class IdempotencyRecord(BaseModel):
+    """
+    A request fingerprint and, once the request has finished, its response.
+    """
+
+    model_config = ConfigDict(ser_json_bytes="base64", val_json_bytes="base64")
+
+    fingerprint: str
+    status_code: int | None = None
+    headers: list[tuple[str, str]] = []
+    body: bytes = b""
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotencyBackend(Protocol):
+    async def reserve(
+        self, key: str, record: IdempotencyRecord
+    ) -> IdempotencyRecord | None:
+        """
+        Store the pending `record` unless `key` exists, else return the
+        existing record.
+        """
+        ...
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None: ...
+
+    async def release(self, key: str) -> None: ...
+
+
+class MemoryIdempotencyBackend:
+    """
+    Reservations are atomic because they never await, so every request
+    handled by one event loop sees them in order.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, lock_ttl: float):
+        self.lock_ttl = lock_ttl
+        self._cache: TTLCache[str, IdempotencyRecord] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+
+    async def reserve(
+        self, key: str, record: IdempotencyRecord
+    ) -> IdempotencyRecord | None:
+        existing = self._cache.get(key)
+        if existing is not None:
+            return existing
+        self._cache.set(key, record, ttl=self.lock_ttl)
+        return None
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        self._cache.set(key, record)
+
+    async def release(self, key: str) -> None:
+        self._cache.pop(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisIdempotencyBackend:
+    """
+    Stores records as JSON in any client exposing the redis.asyncio
+    `get`/`set(ex=..., nx=...)`/`delete` methods.
+    """
+
+    def __init__(
+        self, client: Any, ttl: float, lock_ttl: float, prefix: str = "idempotency:"
+    ):
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.lock_ttl = max(int(lock_ttl), 1)
+        self.prefix = prefix
+
+    async def reserve(
+        self, key: str, record: IdempotencyRecord
+    ) -> IdempotencyRecord | None:
+        name = f"{self.prefix}{key}"
+        if await self.client.set(
+            name, record.model_dump_json(), ex=self.lock_ttl, nx=True
+        ):
+            return None
+        raw = await self.client.get(name)
+        if raw is None:
+            # Expired between the two calls; report it as still in progress.
+            return record
+        return IdempotencyRecord.model_validate_json(raw)
+
+    async def complete(self, key: str, record: IdempotencyRecord) -> None:
+        await self.client.set(
+            f"{self.prefix}{key}", record.model_dump_json(), ex=self.ttl
+        )
+
+    async def release(self, key: str) -> None:
+        await self.client.delete(f"{self.prefix}{key}")
+
+
+def build_idempotency_backend() -> IdempotencyBackend | None:
+    if settings.IDEMPOTENCY_BACKEND == "none":
+        return None
+
+    if settings.IDEMPOTENCY_BACKEND == "redis":
+        import redis.asyncio as redis
+
+        return RedisIdempotencyBackend(
+            redis.Redis.from_url(settings.REDIS_URL),
+            ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+            lock_ttl=settings.IDEMPOTENCY_LOCK_SECONDS,
+        )
+
+    return MemoryIdempotencyBackend(
+        maxsize=settings.IDEMPOTENCY_MAX_SIZE,
+        ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+        lock_ttl=settings.IDEMPOTENCY_LOCK_SECONDS,
+    )
+
+
+idempotency_backend = build_idempotency_backend()
+
+
+class _Disconnected:
+    """
+    Returned by `_read_body` when the client goes away before the body ends.
+    """
+
+
+DISCONNECTED = _Disconnected()
+
+
+def should_store(status_code: int, headers: Headers) -> bool:
+    if status_code >= 500 or status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+        return False
+    return "no-store" not in headers.get("cache-control", "")
+
+
+def scoped_key(scope: Scope, headers: Headers, key: str) -> str:
+    digest = hashlib.sha256()
+    for part in (
+        scope["method"],
+        scope["path"],
+        headers.get("authorization", ""),
+        key,
+    ):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def fingerprint(scope: Scope, body: bytes) -> str:
+    """
+    Identifies the request a key was first used with: its query string and body.
+    """
+    digest = hashlib.sha256(scope.get("query_string", b""))
+    digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def error_response(
+    status_code: int, detail: str, headers: dict[str, str] | None = None
+) -> ORJSONResponse:
+    return ORJSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+
+
+class IdempotencyMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: IdempotencyBackend | None = idempotency_backend,
+        max_body_size: int = settings.IDEMPOTENCY_MAX_BODY_BYTES,
+    ) -> None:
+        self.app = app
+        self.backend = backend
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        backend = self.backend
+        if scope["type"] != "http" or scope["method"] != "POST" or backend is None:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not VALID_KEY.fullmatch(key):
+            response = error_response(
+                status.HTTP_400_BAD_REQUEST, "Invalid Idempotency-Key"
+            )
+            await response(scope, receive, send)
+            return
+        body = await self._read_body(receive)
+        if isinstance(body, _Disconnected):
+            # A partial body must neither run nor claim the key, or the
+            # client's retry with the full body would be rejected as a
+            # different request.
+            return
+        if body is None:
+            response = error_response(
+                status.HTTP_413_CONTENT_TOO_LARGE,
+                "Request body too large for Idempotency-Key",
+            )
+            await response(scope, receive, send)
+            return
+
+        storage_key = scoped_key(scope, headers, key)
+        record = IdempotencyRecord(fingerprint=fingerprint(scope, body))
+        try:
+            existing = await backend.reserve(storage_key, record)
+        except Exception as e:
+            logger.warning("Idempotency store unavailable, running request: %s", e)
+            await self.app(scope, self._replay_body(body, receive), send)
+            return
+
+        if existing is not None:
+            await self._answer_duplicate(existing, record, scope, receive, send)
+            return
+        IDEMPOTENCY_REQUESTS.labels("new").inc()
+        await self._run_and_store(
+            backend, storage_key, record.fingerprint, body, scope, receive, send
+        )
+
+    async def _read_body(self, receive: Receive) -> bytes | _Disconnected | None:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return DISCONNECTED
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_body_size:
+                return None
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _replay_body(body: bytes, receive: Receive) -> Receive:
+        pending = True
+
+        async def replay() -> Message:
+            nonlocal pending
+            if pending:
+                pending = False
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return replay
+
+    async def _answer_duplicate(
+        self,
+        existing: IdempotencyRecord,
+        record: IdempotencyRecord,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if existing.fingerprint != record.fingerprint:
+            IDEMPOTENCY_REQUESTS.labels("mismatch").inc()
+            response = error_response(
+                status.HTTP_422_UNPROCESSABLE_CONTENT,
+                "Idempotency-Key was used with a different request",
+            )
+        elif not existing.completed:
+            IDEMPOTENCY_REQUESTS.labels("in_progress").inc()
+            response = error_response(
+                status.HTTP_409_CONFLICT,
+                "A request with this Idempotency-Key is in progress",
+                headers={"Retry-After": "1"},
+            )
+        else:
+            IDEMPOTENCY_REQUESTS.labels("replayed").inc()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": existing.status_code,
+                    "headers": [
+                        (name.encode("latin-1"), value.encode("latin-1"))
+                        for name, value in existing.headers
+                    ]
+                    + [(b"idempotent-replayed", b"true")],
+                }
+            )
+            await send({"type": "http.response.body", "body": existing.body})
+            return
+        await response(scope, receive, send)
+
+    async def _run_and_store(
+        self,
+        backend: IdempotencyBackend,
+        key: str,
+        fingerprint: str,
+        body: bytes,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        start: Message = {}
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, self._replay_body(body, receive), capture)
+        except BaseException:
+            await self._release(backend, key)
+            raise
+
+        raw_headers = start.get("headers", [])
+        if not start or not should_store(start["status"], Headers(raw=raw_headers)):
+            await self._release(backend, key)
+            return
+        record = IdempotencyRecord(
+            fingerprint=fingerprint,
+            status_code=start["status"],
+            headers=[
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in raw_headers
+            ],
+            body=b"".join(chunks),
+        )
+        try:
+            await backend.complete(key, record)
+        except Exception as e:
+            logger.warning("Failed to store idempotent response: %s", e)
+
+    @staticmethod
+    async def _release(backend: IdempotencyBackend, key: str) -> None:
+        try:
+            await backend.release(key)
+        except Exception as e:
+            logger.warning("Failed to release Idempotency-Key: %s", e)
@@ -1,13 +1,39 @@
 """
 Logging configuration module.
 
-Provides custom log levels and a helper function to configure Python logging.
+Log records are handed to a `QueueHandler` and written by a `QueueListener`
+thread, so request handlers never block on the output stream. Records are
+rendered as one JSON object per line (or plain text for local development)
+and carry the request id and trace id of the request that produced them,
+which `RequestIdMiddleware` sets from the `X-Request-ID` and `traceparent`
+headers.
+
+Messages should be passed as %-style format strings with arguments so that
+records dropped by the level or a `LogSampler` are never formatted.
 """
 
+import atexit
+import copy
 import logging
+import queue
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from enum import StrEnum
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Literal
+
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 LOG_FORMAT_DEBUG = "%(levelname)s:%(message)s:%(pathname)s:%(lineno)d"
+LOG_FORMAT_TEXT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+LogFormat = Literal["json", "text"]
 
 
 class LogLevels(StrEnum):
@@ -17,18 +43,177 @@ class LogLevels(StrEnum):
     DEBUG = "DEBUG"
 
 
-def configure_logging(log_level: LogLevels = LogLevels.ERROR) -> None:
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+trace_id_var: ContextVar[str | None] = ContextVar("trace_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`.
+_BLANK_RECORD = logging.LogRecord("", 0, "", 0, "", None, None)
+_RECORD_ATTRS = {
+    *_BLANK_RECORD.__dict__,
+    "message",
+    "asctime",
+    "request_id",
+    "trace_id",
+}
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps records with the current request and trace ids.
+
+    Must run in the thread that logged, before the record is queued.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        record.trace_id = trace_id_var.get()
+        return True
+
+
+class LogSampler(logging.Filter):
+    """
+    Keeps only a fraction of records at or below `max_level`.
+
+    Attach it to the logger of a module whose routine records are too
+    frequent to keep in full; warnings and errors always pass.
+    """
+
+    def __init__(self, rate: float, max_level: int = logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.max_level = max_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > self.max_level or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in ("request_id", "trace_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return orjson.dumps(entry, default=str).decode()
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats the whole record here, in the logging
+        # thread; only resolve what cannot cross threads and leave the
+        # rendering to the listener.
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging(
+    log_level: LogLevels = LogLevels.ERROR, log_format: LogFormat = "json"
+) -> None:
     """
     Configures Python logging with the specified log level.
 
+    Replaces the root logger's handlers with a queue feeding a background
+    listener that writes to stderr. Safe to call more than once.
+
     Args:
         log_level (LogLevels): Desired logging level. Defaults to ERROR.
+        log_format (LogFormat): "json" for one object per line, or "text".
     """
-    level = log_level.value.upper()
-
-    log_format = LOG_FORMAT_DEBUG if log_level == LogLevels.DEBUG else None
+    global _listener
+    stop_logging()
 
-    if log_format:
-        logging.basicConfig(level=level, format=log_format)
+    stream = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        stream.setFormatter(JSONFormatter())
+    elif log_level == LogLevels.DEBUG:
+        stream.setFormatter(logging.Formatter(LOG_FORMAT_DEBUG))
     else:
-        logging.basicConfig(level=level)
+        stream.setFormatter(logging.Formatter(LOG_FORMAT_TEXT))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = _QueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, _QueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(log_level.value.upper())
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """
+    Flush queued records and stop the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
+_REQUEST_ID = re.compile(r"^[\w.:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """
+    Binds a request id and trace id to everything logged during a request.
+
+    A well-formed incoming `X-Request-ID` is kept, otherwise a new one is
+    generated; either way it is echoed in the response. The trace id is
+    taken from a W3C `traceparent` header when present.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_id = headers.get("x-request-id", "")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        traceparent = _TRACEPARENT.match(headers.get("traceparent", ""))
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Request-ID", request_id)
+            await send(message)
+
+        request_token = request_id_var.set(request_id)
+        trace_token = trace_id_var.set(traceparent.group(1) if traceparent else None)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            trace_id_var.reset(trace_token)
+            request_id_var.reset(request_token)
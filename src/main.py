@@ -1,15 +1,66 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 
 from src.api import register_routes
-from src.logging_config import LogLevels, configure_logging
+from src.auth import hashing
+from src.auth.service import warm_up as warm_up_auth
+from src.compression import CompressionMiddleware
+from src.database.core import dispose_engines, warm_up_async_pool, warm_up_pool
+from src.health import drain_on_sigterm
+from src.idempotency import IdempotencyMiddleware
+from src.logging_config import RequestIdMiddleware, configure_logging
+from src.metrics import MetricsMiddleware
+from src.responses import ORJSONResponse
 from src.settings import settings
+from src.tracing import TracingMiddleware, configure_tracing
+
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+if settings.TRACING_ENABLED:
+    configure_tracing()
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Warm the connection pools, JWT keys and password hasher before serving,
+    hook readiness into SIGTERM, and close the pools on shutdown.
+    """
+    started = time.perf_counter()
+    try:
+        await run_in_threadpool(warm_up_pool)
+        if settings.ASYNC_DB_ROUTES:
+            await warm_up_async_pool()
+    except Exception as e:
+        # Keep starting; readiness checks report the database separately.
+        logger.error("Database warm-up failed: %s", e)
+    await run_in_threadpool(warm_up_auth)
+    logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - started) * 1000)
+    drain_on_sigterm()
+
+    yield
 
-configure_logging(LogLevels.INFO)
+    await dispose_engines()
+    await run_in_threadpool(hashing.executor.shutdown)
 
 
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url=None if settings.APP_ENV == "production" else "/docs",
     redoc_url=None if settings.APP_ENV == "production" else "/redoc",
     openapi_url=None if settings.APP_ENV == "production" else "/openapi.json",
 )
+# Inside compression, so stored responses are replayed in any encoding.
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestIdMiddleware)
 register_routes(app)
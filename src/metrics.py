@@ -0,0 +1,238 @@
+"""
+Request metrics and Server-Timing.
+
+`MetricsMiddleware` records per-route latency, in-flight requests and
+status counts, and opens a per-request `RequestTimings` that the database
+query hooks (`track_queries`) and the password hashing executor add to.
+The totals are exported as histograms and, with SERVER_TIMING_ENABLED, as
+a `Server-Timing` response header. Everything is served at `/metrics`.
+
+Setting PROMETHEUS_MULTIPROC_DIR switches `/metrics` to prometheus_client's
+multiprocess collector so every worker's samples are aggregated.
+"""
+
+import functools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator
+
+from fastapi import APIRouter, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import Engine, event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.settings import settings
+from src.tracing import statement_span
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the response started, by route",
+    ["method", "route"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+RESPONSES = Counter(
+    "http_responses_total",
+    "Responses sent, by route and status code",
+    ["method", "route", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing database statements per request",
+    ["route"],
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_duration_seconds",
+    "Password hashing and verification time, including executor queueing",
+    ["operation"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+class RequestTimings:
+    """
+    Per-request totals of time spent in the database and password hashing.
+    """
+
+    __slots__ = ("db_queries", "db_seconds", "hash_seconds")
+
+    def __init__(self) -> None:
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def server_timing(self, app_seconds: float) -> str:
+        return (
+            f"app;dur={app_seconds * 1000:.1f}, "
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries", '
+            f"hash;dur={self.hash_seconds * 1000:.1f}"
+        )
+
+
+# Shared by reference with threadpool workers, which run in a copy of the
+# request's context.
+_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def time_password_hash(operation: str) -> Iterator[None]:
+    started = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - started
+    PASSWORD_HASH_SECONDS.labels(operation).observe(elapsed)
+    timings = _timings.get()
+    if timings is not None:
+        timings.hash_seconds += elapsed
+
+
+def _timed_execute(method: str) -> Callable[..., bool]:
+    def execute(cursor, statement, *args) -> bool:
+        context = args[-1]
+        dialect = context.dialect
+        with statement_span(statement, dialect.name):
+            timings = _timings.get()
+            if timings is None:
+                getattr(dialect, method)(cursor, statement, *args)
+                return True
+            started = time.perf_counter()
+            try:
+                getattr(dialect, method)(cursor, statement, *args)
+            finally:
+                timings.db_queries += 1
+                timings.db_seconds += time.perf_counter() - started
+        return True
+
+    return execute
+
+
+def track_queries(engine: Engine) -> None:
+    """
+    Add every statement `engine` executes to the current request's timings,
+    and give it a span when tracing is enabled.
+
+    Hooks the dialect's execute calls rather than the connection's cursor
+    events: any connection event listener switches SQLAlchemy onto its
+    slower dispatching code path for every statement, while dialect hooks
+    are only consulted at the point the cursor is invoked. SQLAlchemy stops
+    at the first of these hooks that executes the statement, so this must
+    be the only one on `engine`.
+    """
+    for method in ("do_execute", "do_execute_no_params", "do_executemany"):
+        event.listen(engine, method, _timed_execute(method))
+
+
+HTTP_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"}
+)
+
+
+def method_label(scope: Scope) -> str:
+    method = scope["method"]
+    return method if method in HTTP_METHODS else "OTHER"
+
+
+def route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    # Only matched route templates are used as labels to bound cardinality.
+    return getattr(route, "path_format", None) or "unmatched"
+
+
+@functools.cache
+def _route_metrics(method: str, route: str) -> tuple[Any, Any, Any]:
+    # Resolving labelled children takes a lock and a dict lookup each time;
+    # the set of routes is small and fixed, so resolve them once.
+    return (
+        REQUEST_DURATION.labels(method, route),
+        REQUEST_DB_QUERIES.labels(route),
+        REQUEST_DB_SECONDS.labels(route),
+    )
+
+
+@functools.cache
+def _in_progress(method: str) -> Any:
+    return REQUESTS_IN_PROGRESS.labels(method)
+
+
+@functools.cache
+def _response_counter(method: str, route: str, status: int) -> Any:
+    return RESPONSES.labels(method, route, str(status))
+
+
+class MetricsMiddleware:
+    def __init__(
+        self, app: ASGIApp, server_timing: bool = settings.SERVER_TIMING_ENABLED
+    ) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = method_label(scope)
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed = time.perf_counter() - started
+                duration, db_queries, db_seconds = _route_metrics(
+                    method, route_label(scope)
+                )
+                duration.observe(elapsed)
+                db_queries.observe(timings.db_queries)
+                db_seconds.observe(timings.db_seconds)
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", timings.server_timing(elapsed))
+            await send(message)
+
+        in_progress = _in_progress(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            in_progress.dec()
+            _response_counter(method, route_label(scope), status_code).inc()
+            _timings.reset(token)
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -1,4 +1,68 @@
+"""
+Shared rate limiter.
+
+Counters live in the storage named by RATE_LIMIT_STORAGE_URI so limits are
+enforced across every worker and pod (e.g. "redis://redis:6379/1"); the
+default "memory://" keeps them in-process, which is what tests use.
+
+The limiter fails open: storage calls are bounded by RATE_LIMIT_TIMEOUT_MS
+and errors are logged and swallowed, so a slow or unavailable backend costs
+a request at most the latency budget instead of failing it. With
+RATE_LIMIT_IN_MEMORY_FALLBACK each worker enforces its own in-process
+limits until the backend comes back.
+"""
+
+from typing import Any
+
 from slowapi import Limiter
 from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from src.settings import settings
+
+REDIS_SCHEMES = ("redis://", "rediss://", "redis+")
+
+
+def storage_options(storage_uri: str, timeout_ms: int) -> dict[str, Any]:
+    """
+    Client options bounding each storage round trip to `timeout_ms`.
+    """
+    if storage_uri.startswith(REDIS_SCHEMES):
+        timeout = timeout_ms / 1000
+        return {"socket_timeout": timeout, "socket_connect_timeout": timeout}
+    return {}
+
+
+class FailOpenLimiter(Limiter):
+    """
+    slowapi leaves `request.state.view_rate_limit` unset when it swallows a
+    storage error, which then breaks its own response-header step. Default
+    it before every check so a swallowed error really lets the request in.
+    """
+
+    def _check_request_limit(
+        self, request: Request, endpoint_func: Any, in_middleware: bool = True
+    ) -> None:
+        request.state.view_rate_limit = None
+        super()._check_request_limit(request, endpoint_func, in_middleware)
+
+
+def build_limiter(
+    storage_uri: str = settings.RATE_LIMIT_STORAGE_URI,
+    strategy: str = settings.RATE_LIMIT_STRATEGY,
+    fail_open: bool = settings.RATE_LIMIT_FAIL_OPEN,
+    timeout_ms: int = settings.RATE_LIMIT_TIMEOUT_MS,
+    in_memory_fallback: bool = settings.RATE_LIMIT_IN_MEMORY_FALLBACK,
+) -> Limiter:
+    return FailOpenLimiter(
+        key_func=get_remote_address,
+        storage_uri=storage_uri,
+        storage_options=storage_options(storage_uri, timeout_ms),
+        strategy=strategy,
+        swallow_errors=fail_open,
+        in_memory_fallback_enabled=in_memory_fallback,
+        key_prefix="rl",
+    )
+
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = build_limiter()
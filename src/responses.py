@@ -0,0 +1,54 @@
+"""
+Response classes and helpers for the JSON hot paths.
+
+`ORJSONResponse` is the application's default response class. Endpoints
+that already hold a validated pydantic model can return `ModelResponse`
+instead, which serializes the model straight to JSON bytes in
+pydantic-core, skipping FastAPI's response_model re-validation and the
+intermediate dict. `conditional_response` adds ETag/304 handling on top.
+"""
+
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+
+__all__ = ["ModelResponse", "ORJSONResponse", "conditional_response", "etag_matches"]
+
+
+class ModelResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return pydantic_core.to_json(content)
+        return super().render(content)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Weak comparison of `etag` against an If-None-Match header value.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_response(
+    content: BaseModel | None, etag: str, cache_control: str = "private, no-cache"
+) -> Response:
+    """
+    200 with `content` and its ETag, or 304 when `content` is None.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if content is None:
+        return Response(status_code=304, headers=headers)
+    return ModelResponse(content, headers=headers)
@@ -0,0 +1,137 @@
+"""
+Production launcher: gunicorn managing uvicorn workers.
+
+Usage:
+    python -m src.server
+    python -m src.server --workers 4 --port 8080
+
+Workers default to one per available CPU and run uvloop with the
+httptools parser. The app is imported once in the master before forking
+so workers share its memory; each worker then drops the database
+connections and restarts the logging thread it inherited. On SIGTERM
+workers fail readiness for SHUTDOWN_DRAIN_SECONDS while still serving
+(see src/health.py), then stop accepting connections and get
+SERVER_GRACEFUL_TIMEOUT_SECONDS to finish in-flight requests.
+
+With more than one worker Prometheus metrics are kept per process in
+PROMETHEUS_MULTIPROC_DIR (a temporary directory unless set) and merged by
+`/metrics`. It must be set before `prometheus_client` is imported, which
+is why this module imports the app lazily.
+"""
+
+import glob
+import logging
+import math
+import os
+import tempfile
+from typing import Annotated, Any
+
+import typer
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from src.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    }
+
+
+def default_workers() -> int:
+    # Honours CPU affinity (e.g. taskset or a cpuset cgroup), unlike cpu_count.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def prepare_multiprocess_metrics() -> None:
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory is None:
+        directory = tempfile.mkdtemp(prefix="prometheus-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    # Files left by a previous run would be merged into this one's metrics.
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+
+
+def post_fork(server: Any, worker: Any) -> None:
+    from src.database.core import dispose_engines_after_fork
+    from src.logging_config import configure_logging
+
+    dispose_engines_after_fork()
+    # The listener thread does not survive the fork.
+    configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT)
+
+
+def child_exit(server: Any, worker: Any) -> None:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict[str, Any]):
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from src.main import app
+
+        return app
+
+
+def serve(
+    host: Annotated[str, typer.Option()] = settings.SERVER_HOST,
+    port: Annotated[int, typer.Option()] = settings.SERVER_PORT,
+    workers: Annotated[
+        int, typer.Option(help="0 means one per CPU.")
+    ] = settings.SERVER_WORKERS,
+) -> None:
+    """
+    Run the API with gunicorn and uvicorn workers.
+    """
+    workers = workers or default_workers()
+    if workers > 1:
+        prepare_multiprocess_metrics()
+        if (
+            settings.DATABASE_REPLICA_URLS
+            and settings.READ_YOUR_WRITES_BACKEND == "memory"
+        ):
+            logger.warning(
+                "Read-your-writes pins are per worker; set "
+                "READ_YOUR_WRITES_BACKEND=redis to share them"
+            )
+
+    Server(
+        {
+            "bind": f"{host}:{port}",
+            "workers": workers,
+            "worker_class": Worker,
+            "preload_app": True,
+            "backlog": settings.SERVER_BACKLOG,
+            "keepalive": settings.SERVER_KEEPALIVE_SECONDS,
+            # Workers keep serving while draining, then finish in-flight work.
+            "graceful_timeout": math.ceil(
+                settings.SHUTDOWN_DRAIN_SECONDS
+                + settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+            ),
+            "post_fork": post_fork,
+            "child_exit": child_exit,
+        }
+    ).run()
+
+
+if __name__ == "__main__":
+    typer.run(serve)
@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from src.logging_config import LogFormat, LogLevels
+
 
 class Settings(BaseSettings):
     """
@@ -10,9 +14,132 @@ class Settings(BaseSettings):
     APP_ENV: str = "development"
     DEBUG: bool = False
 
+    LOG_LEVEL: LogLevels = LogLevels.INFO
+    LOG_FORMAT: LogFormat = "json"
+    # Fraction of routine info records kept from high-volume code paths.
+    LOG_SAMPLE_RATE: float = 0.01
+
     DATABASE_URL: str
+    # Defaults to DATABASE_URL with its driver swapped for asyncpg/aiosqlite.
+    ASYNC_DATABASE_URL: str | None = None
+    # Routes served through the async database layer, e.g. ["users.me"].
+    ASYNC_DB_ROUTES: set[str] = set()
+    # Read-only service calls are spread round-robin over these replicas.
+    DATABASE_REPLICA_URLS: list[str] = []
+    REPLICA_EJECT_SECONDS: float = 30.0
+    # After a user's own write, their reads stay on the primary this long.
+    # The memory backend is per process; use redis behind several workers.
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    READ_YOUR_WRITES_BACKEND: Literal["memory", "redis"] = "memory"
+
+    # Connection pool sizing is per process: multiply by the worker count
+    # to get the number of connections a deployment can open.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
+    # Connections each process opens (and health-checks) at start-up,
+    # capped at DB_POOL_SIZE; 0 skips the warm-up.
+    DB_WARMUP_CONNECTIONS: int = 2
+
+    # Production server (python -m src.server). 0 workers means one per CPU.
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    # Per worker; connections beyond this get a 503 instead of queueing.
+    SERVER_LIMIT_CONCURRENCY: int | None = None
+    # How long in-flight requests get to finish after SIGTERM.
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    # After SIGTERM /readyz fails for this long while requests are still
+    # served, so load balancers stop routing here before shutdown starts.
+    SHUTDOWN_DRAIN_SECONDS: float = 5.0
+    READINESS_CACHE_SECONDS: float = 2.0
 
     SECRET_KEY: str
+    # Shared secret for admin endpoints (X-Admin-Key header); unset disables them.
+    ADMIN_API_KEY: str | None = None
+
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # How often each worker reloads revoked refresh-token families.
+    REVOCATION_REFRESH_SECONDS: float = 30.0
+
+    # HS256 signs with SECRET_KEY; EdDSA/ES256 use the PEM keys in
+    # JWT_KEYS_DIR (see src/auth/keys.py for the rotation layout).
+    JWT_ALGORITHM: Literal["HS256", "EdDSA", "ES256"] = "HS256"
+    JWT_KEYS_DIR: str | None = None
+    JWT_KEYS_RELOAD_SECONDS: float = 60.0
+
+    # Password hashing runs on a dedicated executor so Argon2 never blocks
+    # the event loop. A worker count of 0 means "one per CPU".
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASH_WORKERS: int = 0
+    PASSWORD_HASH_QUEUE_DEPTH: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    # Argon2id cost profile. Raising it upgrades existing hashes on next login.
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+
+    # Verified bearer tokens cached until their `exp`; 0 disables the cache.
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+    RATE_LIMIT_STRATEGY: Literal[
+        "fixed-window", "moving-window", "sliding-window-counter"
+    ] = "fixed-window"
+    RATE_LIMIT_FAIL_OPEN: bool = True
+    RATE_LIMIT_TIMEOUT_MS: int = 5
+    RATE_LIMIT_IN_MEMORY_FALLBACK: bool = False
+
+    LOGIN_RATE_LIMIT_PER_IP: str = "20/minute"
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: str = "10/minute"
+    LOGIN_LOCKOUT_THRESHOLD: int = 5
+    LOGIN_LOCKOUT_BASE_SECONDS: float = 1.0
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 900.0
+
+    # Adds a Server-Timing header (app, db and hash time) to every response.
+    SERVER_TIMING_ENABLED: bool = True
+
+    # OpenTelemetry tracing. Root spans are kept with TRACING_SAMPLE_RATIO
+    # probability; requests with a sampled traceparent are always traced.
+    # The OTLP endpoint defaults to the OTEL_EXPORTER_OTLP_* variables.
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATIO: float = 0.01
+    TRACING_SERVICE_NAME: str = "fastapi-server"
+    OTLP_ENDPOINT: str | None = None
+
+    # Responses smaller than this are sent uncompressed.
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    USER_CACHE_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_MAX_SIZE: int = 10_000
+
+    # Stored responses for POST requests sent with an Idempotency-Key. The
+    # memory backend is per process; use redis behind several workers.
+    IDEMPOTENCY_BACKEND: Literal["memory", "redis", "none"] = "memory"
+    IDEMPOTENCY_TTL_SECONDS: float = 24 * 60 * 60
+    IDEMPOTENCY_MAX_SIZE: int = 10_000
+    # A key whose request never finished (e.g. the worker died) frees up
+    # after this long.
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0
+    IDEMPOTENCY_MAX_BODY_BYTES: int = 1024 * 1024
+
+    BULK_IMPORT_BATCH_SIZE: int = 1000
+    BULK_IMPORT_WORKERS: int = 0
+    BULK_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    BULK_EXPORT_BATCH_SIZE: int = 1000
+    BULK_EXPORT_CHUNK_BYTES: int = 64 * 1024
 
     model_config = SettingsConfigDict(
         env_file=".env",
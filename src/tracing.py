@@ -0,0 +1,170 @@
+"""
+Opt-in OpenTelemetry tracing.
+
+With TRACING_ENABLED, `configure_tracing` installs a tracer exporting over
+OTLP and the app records spans for each request (`TracingMiddleware`),
+each database statement (via `src.metrics.track_queries`), password
+hashing and JWT signing/verification. Until then every helper here is a
+no-op.
+
+Sampling is decided once per trace at its root: TRACING_SAMPLE_RATIO of
+new traces are recorded, and an incoming `traceparent` header's decision
+is followed, so the overhead at full traffic is bounded by the ratio.
+"""
+
+import atexit
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING, Any
+
+from opentelemetry.trace import (
+    SpanKind,
+    StatusCode,
+    Tracer,
+    format_trace_id,
+    get_current_span,
+)
+from opentelemetry.trace.propagation.tracecontext import (
+    TraceContextTextMapPropagator,
+)
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.logging_config import trace_id_var
+from src.settings import settings
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+
+_provider: "TracerProvider | None" = None
+_tracer: Tracer | None = None
+_propagator = TraceContextTextMapPropagator()
+
+
+def configure_tracing(
+    exporter: "SpanExporter | None" = None,
+    sample_ratio: float = settings.TRACING_SAMPLE_RATIO,
+) -> "TracerProvider":
+    """
+    Start recording spans.
+
+    Spans are batched to the OTLP endpoint unless an `exporter` is given,
+    in which case they are handed to it synchronously (e.g. an
+    `InMemorySpanExporter` in tests).
+    """
+    # The SDK is only imported here so deployments without tracing don't
+    # pay for it at start-up.
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+    global _provider, _tracer
+    shutdown_tracing()
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    if exporter is None:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        provider.add_span_processor(
+            BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.OTLP_ENDPOINT))
+        )
+    else:
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+    _provider = provider
+    _tracer = provider.get_tracer(__name__)
+    return provider
+
+
+def shutdown_tracing() -> None:
+    """
+    Flush pending spans and go back to not tracing.
+    """
+    global _provider, _tracer
+    if _provider is not None:
+        _provider.shutdown()
+    _provider = _tracer = None
+
+
+atexit.register(shutdown_tracing)
+
+
+def _recording() -> bool:
+    # Children of an unsampled span are never sampled either, so skip
+    # creating them at all.
+    return _tracer is not None and get_current_span().is_recording()
+
+
+def span(
+    name: str, attributes: dict[str, Any] | None = None
+) -> AbstractContextManager[Any]:
+    """
+    Context manager for a child span of the current one, if it is sampled.
+    """
+    if not _recording():
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def statement_span(statement: str, dialect: str) -> AbstractContextManager[Any]:
+    if not _recording():
+        return nullcontext()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else "SQL"
+    return _tracer.start_as_current_span(
+        operation,
+        kind=SpanKind.CLIENT,
+        attributes={"db.system": dialect, "db.statement": statement},
+    )
+
+
+class TracingMiddleware:
+    """
+    Opens a server span per request, continuing any incoming trace.
+
+    The span is renamed to the matched route template once routing is done
+    and its trace id is bound for the request's log records.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        tracer = _tracer
+        if tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        parent = _propagator.extract(Headers(scope=scope))
+        with tracer.start_as_current_span(
+            method,
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "url.path": scope["path"]},
+        ) as request_span:
+
+            async def send_with_span(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    route = getattr(scope.get("route"), "path_format", None)
+                    if route:
+                        request_span.update_name(f"{method} {route}")
+                        request_span.set_attribute("http.route", route)
+                    request_span.set_attribute("http.response.status_code", status_code)
+                    if status_code >= 500:
+                        request_span.set_status(StatusCode.ERROR)
+                await send(message)
+
+            token = trace_id_var.set(
+                format_trace_id(request_span.get_span_context().trace_id)
+            )
+            try:
+                await self.app(scope, receive, send_with_span)
+            finally:
+                trace_id_var.reset(token)
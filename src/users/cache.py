@@ -0,0 +1,178 @@
+"""
+Short-lived cache of user profiles keyed by user id.
+
+Serves `/users/me` without a database round trip. Entries hold a
+`UserResponse` and its ETag, so nothing sensitive (e.g. the password hash)
+is cached.
+Every write to a user row must call `user_cache.invalidate(user_id)`.
+Async code uses the `*_async` methods, which keep a redis round trip off
+the event loop.
+"""
+
+import logging
+from typing import Any, Protocol
+
+from prometheus_client import Counter
+from starlette.concurrency import run_in_threadpool
+
+from src.cache import TTLCache
+from src.settings import settings
+from src.users.model import CachedProfile
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_REQUESTS = Counter(
+    "user_cache_requests_total",
+    "User profile cache lookups",
+    ["result"],
+)
+
+
+class UserCacheBackend(Protocol):
+    def get(self, user_id: int) -> CachedProfile | None: ...
+
+    def set(self, entry: CachedProfile) -> None: ...
+
+    def delete(self, user_id: int) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryUserCacheBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache: TTLCache[int, CachedProfile] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, user_id: int) -> CachedProfile | None:
+        return self._cache.get(user_id)
+
+    def set(self, entry: CachedProfile) -> None:
+        self._cache.set(entry.profile.id, entry)
+
+    def delete(self, user_id: int) -> None:
+        self._cache.pop(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class RedisUserCacheBackend:
+    """
+    Stores profiles as JSON in any client exposing the redis-py
+    `get`/`set(ex=...)`/`delete`/`scan_iter` methods.
+    """
+
+    def __init__(self, client: Any, ttl: float, prefix: str = "user-profile:"):
+        self.client = client
+        self.ttl = max(int(ttl), 1)
+        self.prefix = prefix
+
+    def get(self, user_id: int) -> CachedProfile | None:
+        raw = self.client.get(f"{self.prefix}{user_id}")
+        if raw is None:
+            return None
+        return CachedProfile.model_validate_json(raw)
+
+    def set(self, entry: CachedProfile) -> None:
+        self.client.set(
+            f"{self.prefix}{entry.profile.id}", entry.model_dump_json(), ex=self.ttl
+        )
+
+    def delete(self, user_id: int) -> None:
+        self.client.delete(f"{self.prefix}{user_id}")
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class UserCache:
+    """
+    Counts hits and misses and keeps backend failures from failing requests.
+    """
+
+    def __init__(self, backend: UserCacheBackend | None):
+        self.backend = backend
+
+    @property
+    def blocking(self) -> bool:
+        """
+        Whether backend calls do network I/O and must not run on the event loop.
+        """
+        return self.backend is not None and not isinstance(
+            self.backend, MemoryUserCacheBackend
+        )
+
+    def get(self, user_id: int) -> CachedProfile | None:
+        if self.backend is None:
+            return None
+        try:
+            entry = self.backend.get(user_id)
+        except Exception as e:
+            logger.warning("User cache lookup failed for user ID %s: %s", user_id, e)
+            entry = None
+        USER_CACHE_REQUESTS.labels("hit" if entry is not None else "miss").inc()
+        return entry
+
+    def set(self, entry: CachedProfile) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.set(entry)
+        except Exception as e:
+            logger.warning(
+                "User cache store failed for user ID %s: %s", entry.profile.id, e
+            )
+
+    def invalidate(self, user_id: int) -> None:
+        if self.backend is None:
+            return
+        try:
+            self.backend.delete(user_id)
+        except Exception as e:
+            logger.error(
+                "User cache invalidation failed for user ID %s: %s", user_id, e
+            )
+
+    async def get_async(self, user_id: int) -> CachedProfile | None:
+        if self.blocking:
+            return await run_in_threadpool(self.get, user_id)
+        return self.get(user_id)
+
+    async def set_async(self, entry: CachedProfile) -> None:
+        if self.blocking:
+            await run_in_threadpool(self.set, entry)
+        else:
+            self.set(entry)
+
+    async def invalidate_async(self, user_id: int) -> None:
+        if self.blocking:
+            await run_in_threadpool(self.invalidate, user_id)
+        else:
+            self.invalidate(user_id)
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+
+def build_user_cache() -> UserCache:
+    if settings.USER_CACHE_BACKEND == "none":
+        return UserCache(None)
+
+    if settings.USER_CACHE_BACKEND == "redis":
+        import redis
+
+        client = redis.Redis.from_url(settings.REDIS_URL)
+        return UserCache(
+            RedisUserCacheBackend(client, ttl=settings.USER_CACHE_TTL_SECONDS)
+        )
+
+    return UserCache(
+        MemoryUserCacheBackend(
+            maxsize=settings.USER_CACHE_MAX_SIZE,
+            ttl=settings.USER_CACHE_TTL_SECONDS,
+        )
+    )
+
+
+user_cache = build_user_cache()
@@ -1,26 +1,132 @@
-from fastapi import APIRouter, status
+from datetime import datetime
+from typing import Annotated
 
-from src.auth.service import CurrentUser
-from src.database.core import DbSession
+from fastapi import APIRouter, Header, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from src.auth.service import AdminAccess, CurrentUser
+from src.database.core import AsyncDbSession, DbSession, use_async_db
 from src.exceptions import AuthenticationError
-from src.users import model, service
+from src.responses import conditional_response
+from src.users import exporter, importer, model, service
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-@router.get("/me", response_model=model.UserResponse)
-def get_current_user(current_user: CurrentUser, db: DbSession):
+@router.get("", response_model=model.UserPage)
+def list_users(
+    db: DbSession,
+    _: AdminAccess,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    cursor: str | None = None,
+    disabled: bool | None = None,
+    email_prefix: Annotated[str | None, Query(max_length=255)] = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    fields: Annotated[list[model.UserField] | None, Query()] = None,
+):
+    """
+    List users newest first. `created_after` is inclusive, `created_before`
+    exclusive; repeat `fields` to return only those keys.
+    """
+    return service.list_users(
+        db,
+        limit=limit,
+        cursor=cursor,
+        disabled=disabled,
+        email_prefix=email_prefix,
+        created_after=created_after,
+        created_before=created_before,
+        fields=fields,
+    )
+
+
+def _require_user_id(current_user: CurrentUser) -> int:
     if current_user.user_id is None:
         raise AuthenticationError()
-    user_id = int(current_user.user_id)
-    return service.get_user_by_id(db, user_id)
+    return int(current_user.user_id)
+
+
+if use_async_db("users.me"):
+
+    @router.get("/me", response_model=model.UserResponse)
+    async def get_current_user(
+        current_user: CurrentUser,
+        db: AsyncDbSession,
+        if_none_match: Annotated[str | None, Header()] = None,
+    ):
+        profile, etag = await service.get_user_profile_if_modified_async(
+            db, _require_user_id(current_user), if_none_match
+        )
+        return conditional_response(profile, etag)
+
+else:
+
+    @router.get("/me", response_model=model.UserResponse)
+    def get_current_user(
+        current_user: CurrentUser,
+        db: DbSession,
+        if_none_match: Annotated[str | None, Header()] = None,
+    ):
+        profile, etag = service.get_user_profile_if_modified(
+            db, _require_user_id(current_user), if_none_match
+        )
+        return conditional_response(profile, etag)
+
 
+if use_async_db("users.change_password"):
 
-@router.put("/change-password", status_code=status.HTTP_200_OK)
-def change_password(
-    password_change: model.PasswordChange, db: DbSession, current_user: CurrentUser
+    @router.put("/change-password", status_code=status.HTTP_200_OK)
+    async def change_password(
+        password_change: model.PasswordChange,
+        db: AsyncDbSession,
+        current_user: CurrentUser,
+    ):
+        await service.change_password_async(
+            db, _require_user_id(current_user), password_change
+        )
+
+else:
+
+    @router.put("/change-password", status_code=status.HTTP_200_OK)
+    def change_password(
+        password_change: model.PasswordChange, db: DbSession, current_user: CurrentUser
+    ):
+        service.change_password(db, _require_user_id(current_user), password_change)
+
+
+@router.post("/import", response_model=model.ImportReport)
+async def import_users(
+    request: Request,
+    db: DbSession,
+    _: AdminAccess,
+    format: importer.ImportFormat = "ndjson",
 ):
-    if current_user.user_id is None:
-        raise AuthenticationError()
-    user_id = int(current_user.user_id)
-    service.change_password(db, user_id, password_change)
+    """
+    Bulk-create users from an NDJSON or CSV request body.
+    """
+    return await importer.import_stream(
+        db, request.stream(), format, importer.get_import_executor()
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_users(
+    db: DbSession,
+    _: AdminAccess,
+    format: exporter.ExportFormat = "ndjson",
+    gzip: bool = False,
+):
+    """
+    Stream every user as NDJSON or CSV, optionally gzip-compressed.
+    """
+    filename = f"users.{format}"
+    media_type = exporter.MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        exporter.export_users(db, format, gzip=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
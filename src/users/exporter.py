@@ -0,0 +1,106 @@
+"""
+Streaming export of the users table as NDJSON or CSV.
+
+Rows are read through a server-side cursor (`stream_results` with
+`yield_per`), rendered into chunks of roughly `chunk_bytes` and optionally
+gzip-compressed on the fly, so memory stays flat no matter how many users
+there are.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Literal
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.database.replicas import replica
+from src.entities.user import User
+from src.settings import settings
+from src.users import model
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_FIELDS = (*model.UserResponse.model_fields, "created_at")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def iter_user_rows(
+    db: Session, batch_size: int = settings.BULK_EXPORT_BATCH_SIZE
+) -> Iterator[dict[str, Any]]:
+    """
+    Yield every user as a dict of EXPORT_FIELDS, in id order, read from a
+    replica when one is configured.
+    """
+    columns = [getattr(User, field) for field in EXPORT_FIELDS]
+    with replica(db):
+        result = db.execute(
+            select(*columns)
+            .order_by(User.id)
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for row in result:
+            yield dict(zip(EXPORT_FIELDS, row))
+
+
+def _to_text(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def render_ndjson(rows: Iterable[dict[str, Any]], chunk_bytes: int) -> Iterator[bytes]:
+    buffer: list[str] = []
+    size = 0
+    for row in rows:
+        line = json.dumps({key: _to_text(value) for key, value in row.items()})
+        buffer.append(line)
+        size += len(line) + 1
+        if size >= chunk_bytes:
+            yield ("\n".join(buffer) + "\n").encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ("\n".join(buffer) + "\n").encode()
+
+
+def render_csv(rows: Iterable[dict[str, Any]], chunk_bytes: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow([_to_text(row[field]) for field in EXPORT_FIELDS])
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_users(
+    db: Session,
+    fmt: ExportFormat,
+    gzip: bool = False,
+    batch_size: int = settings.BULK_EXPORT_BATCH_SIZE,
+    chunk_bytes: int = settings.BULK_EXPORT_CHUNK_BYTES,
+) -> Iterator[bytes]:
+    """
+    Stream the users table as encoded chunks ready to be written out.
+    """
+    render = render_ndjson if fmt == "ndjson" else render_csv
+    chunks = render(iter_user_rows(db, batch_size), chunk_bytes)
+    return gzip_chunks(chunks) if gzip else chunks
@@ -0,0 +1,234 @@
+"""
+Bulk user import from NDJSON or CSV.
+
+Rows are validated with `ImportUserRow` and buffered into batches.
+For each batch, passwords are hashed in parallel on a process pool and the
+rows are written with a single multi-row `INSERT ... ON CONFLICT DO
+NOTHING RETURNING email`. Invalid rows and emails that already exist are
+reported per line and never abort the import.
+"""
+
+import codecs
+import csv
+import json
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, Callable, Iterable, Literal
+
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.auth.hashing import hash_password
+from src.auth.lockout import normalize_email
+from src.entities.user import User
+from src.settings import settings
+from src.users import model
+
+ImportFormat = Literal["ndjson", "csv"]
+
+DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_import_executor() -> ProcessPoolExecutor:
+    """
+    Process pool used for hashing during imports, created on first use.
+
+    Uses the spawn start method so workers are safe to start from a
+    multi-threaded server process.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.BULK_IMPORT_WORKERS or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def row_parser(fmt: ImportFormat) -> Callable[[str], dict[str, Any] | None]:
+    """
+    Return a function turning one input line into a row dict.
+
+    Blank lines (and the CSV header) yield None. CSV fields may not contain
+    embedded newlines since input is consumed line by line.
+    """
+    if fmt == "ndjson":
+
+        def parse_ndjson(line: str) -> dict[str, Any] | None:
+            if not line.strip():
+                return None
+            row = json.loads(line)
+            if not isinstance(row, dict):
+                raise ValueError("Expected a JSON object")
+            return row
+
+        return parse_ndjson
+
+    header: list[str] = []
+
+    def parse_csv(line: str) -> dict[str, Any] | None:
+        if not line.strip():
+            return None
+        values = next(csv.reader([line]))
+        if not header:
+            header.extend(name.strip() for name in values)
+            return None
+        if len(values) != len(header):
+            raise ValueError(f"Expected {len(header)} columns, got {len(values)}")
+        return {name: value for name, value in zip(header, values) if value != ""}
+
+    return parse_csv
+
+
+class UserImporter:
+    """
+    Accumulates rows and writes them in batches, collecting an ImportReport.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        fmt: ImportFormat,
+        executor: Executor,
+        batch_size: int = settings.BULK_IMPORT_BATCH_SIZE,
+        max_reported_errors: int = settings.BULK_IMPORT_MAX_REPORTED_ERRORS,
+    ):
+        self.db = db
+        self.parse = row_parser(fmt)
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_reported_errors = max_reported_errors
+        self.report = model.ImportReport()
+
+        self._line = 0
+        self._pending: list[tuple[int, model.ImportUserRow]] = []
+
+    def _error(self, line: int, error: str, email: str | None = None) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < self.max_reported_errors:
+            self.report.errors.append(
+                model.ImportRowError(line=line, email=email, error=error)
+            )
+
+    def add_line(self, line: str) -> None:
+        self._line += 1
+        try:
+            row = self.parse(line)
+            if row is None:
+                return
+            request = model.ImportUserRow.model_validate(row)
+        except ValidationError as e:
+            fields = ", ".join(
+                ".".join(str(part) for part in err["loc"]) for err in e.errors()
+            )
+            self._error(self._line, f"Invalid fields: {fields}")
+            return
+        except (ValueError, csv.Error) as e:
+            self._error(self._line, f"Malformed row: {e}")
+            return
+
+        self._pending.append((self._line, request))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_lines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.add_line(line)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+
+        batch: list[tuple[int, model.ImportUserRow]] = []
+        seen: set[str] = set()
+        for line, request in pending:
+            email = normalize_email(request.email)
+            if email in seen:
+                self._error(line, "Duplicate email in import", request.email)
+            else:
+                seen.add(email)
+                batch.append((line, request))
+
+        workers = getattr(self.executor, "_max_workers", 1) or 1
+        hashes = self.executor.map(
+            hash_password,
+            [request.password for _, request in batch],
+            chunksize=max(1, len(batch) // (workers * 4)),
+        )
+
+        now = datetime.now(timezone.utc)
+        values = [
+            {
+                "email": request.email,
+                "first_name": request.first_name,
+                "last_name": request.last_name,
+                "password_hash": password_hash,
+                "image_url": request.image_url,
+                "disabled": bool(request.disabled),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for (_, request), password_hash in zip(batch, hashes)
+        ]
+
+        insert = DIALECT_INSERTS[self.db.get_bind().dialect.name]
+        statement = (
+            insert(User).values(values).on_conflict_do_nothing().returning(User.email)
+        )
+        inserted = {normalize_email(email) for email in self.db.scalars(statement)}
+        self.db.commit()
+
+        self.report.inserted += len(inserted)
+        for line, request in batch:
+            if normalize_email(request.email) not in inserted:
+                self._error(line, "Email already registered", request.email)
+
+    def finish(self) -> model.ImportReport:
+        self.flush()
+        return self.report
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterable[str]:
+    """
+    Split a streamed UTF-8 body into lines without buffering all of it.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def import_stream(
+    db: Session,
+    chunks: AsyncIterable[bytes],
+    fmt: ImportFormat,
+    executor: Executor,
+) -> model.ImportReport:
+    """
+    Import a streamed request body, running each batch off the event loop.
+    """
+    importer = UserImporter(db, fmt, executor)
+    lines: list[str] = []
+    async for line in iter_lines(chunks):
+        lines.append(line)
+        if len(lines) >= importer.batch_size:
+            await run_in_threadpool(importer.add_lines, lines)
+            lines = []
+    await run_in_threadpool(importer.add_lines, lines)
+    return await run_in_threadpool(importer.finish)
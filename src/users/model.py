@@ -1,7 +1,13 @@
-from pydantic import BaseModel, EmailStr
+from typing import Annotated, Any, Literal
+
+from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints
+
+from src.auth.model import RegisterUserRequest
 
 
 class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     email: EmailStr
     first_name: str
@@ -10,7 +16,56 @@ class UserResponse(BaseModel):
     disabled: bool
 
 
+class CachedProfile(BaseModel):
+    """
+    A profile together with the weak ETag of the row it was built from.
+    """
+
+    profile: UserResponse
+    etag: str
+
+
+UserField = Literal["id", "email", "first_name", "last_name", "image_url", "disabled"]
+
+
+class UserPage(BaseModel):
+    """
+    One page of the user listing. Pass `next_cursor` back to get the next page.
+    """
+
+    items: list[dict[str, Any]]
+    next_cursor: str | None = None
+
+
 class PasswordChange(BaseModel):
     current_password: str
     new_password: str
     new_password_confirm: str
+
+
+# Postgres text columns reject NUL characters.
+_NO_NUL = r"^[^\x00]*$"
+
+
+class ImportUserRow(RegisterUserRequest):
+    """
+    One bulk-import row, limited to what fits the `users` columns so a bad
+    row is reported on its own instead of failing its whole batch INSERT.
+    """
+
+    first_name: Annotated[str, StringConstraints(max_length=50, pattern=_NO_NUL)]
+    last_name: Annotated[str, StringConstraints(max_length=50, pattern=_NO_NUL)]
+    password: Annotated[str, StringConstraints(pattern=_NO_NUL)]
+    image_url: Annotated[str, StringConstraints(max_length=500, pattern=_NO_NUL)] = ""
+
+
+class ImportRowError(BaseModel):
+    line: int
+    email: str | None = None
+    error: str
+
+
+class ImportReport(BaseModel):
+    inserted: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = []
@@ -1,26 +1,151 @@
+import base64
+import binascii
+import functools
 import logging
+from datetime import datetime, timezone
+from typing import Sequence
 
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.auth.service import get_password_hash, verify_password
+from src.auth.service import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_password,
+    verify_password_async,
+)
+from src.database.replicas import mark_write, mark_write_async, run_on_replica
 from src.entities.user import User
 from src.exceptions import (
+    InvalidCursorError,
     InvalidPasswordError,
     PasswordMismatchError,
     UserNotFoundError,
 )
+from src.logging_config import LogSampler
+from src.responses import etag_matches
+from src.settings import settings
 from src.users import model
+from src.users.cache import user_cache
+
+logger = logging.getLogger(__name__)
+# User lookups log on every /users/me hit, so only a sample of their
+# info records is kept.
+lookup_logger = logging.getLogger(f"{__name__}.lookups")
+lookup_logger.addFilter(LogSampler(settings.LOG_SAMPLE_RATE))
 
 
 def get_user_by_id(db: Session, user_id: int) -> User:
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
-        logging.warning(f"User not found with ID: {user_id}")
+        lookup_logger.warning("User not found with ID: %s", user_id)
         raise UserNotFoundError(str(user_id))
-    logging.info(f"Successfully retrieved user with ID: {user_id}")
+    lookup_logger.info("Successfully retrieved user with ID: %s", user_id)
     return user
 
 
+def user_etag(user_id: int, updated_at: datetime) -> str:
+    """
+    Weak ETag identifying one version of a user row.
+    """
+    version = int(_naive_utc(updated_at).replace(tzinfo=timezone.utc).timestamp() * 1e6)
+    return f'W/"{user_id}-{version:x}"'
+
+
+def _profile_entry(user: User) -> model.CachedProfile:
+    return model.CachedProfile(
+        profile=model.UserResponse.model_validate(user),
+        etag=user_etag(user.id, user.updated_at),
+    )
+
+
+def _cache_profile(user: User) -> model.CachedProfile:
+    entry = _profile_entry(user)
+    user_cache.set(entry)
+    return entry
+
+
+def get_user_profile_if_modified(
+    db: Session, user_id: int, if_none_match: str | None = None
+) -> tuple[model.UserResponse | None, str]:
+    """
+    Return the user's profile and ETag, or None for the profile when the
+    client's copy named in `if_none_match` is still current.
+
+    Profiles come from the user cache when possible. On a miss with a
+    conditional request only `updated_at` is read by primary key, so an
+    unchanged profile costs neither the full row nor serialization. Reads
+    go to a replica unless the user wrote recently.
+    """
+    entry = user_cache.get(user_id)
+    if entry is not None:
+        if etag_matches(if_none_match, entry.etag):
+            return None, entry.etag
+        return entry.profile, entry.etag
+
+    if if_none_match:
+        updated_at = run_on_replica(
+            db,
+            lambda: db.scalar(select(User.updated_at).where(User.id == user_id)),
+            user_id,
+        )
+        if updated_at is None:
+            raise UserNotFoundError(str(user_id))
+        etag = user_etag(user_id, updated_at)
+        if etag_matches(if_none_match, etag):
+            return None, etag
+
+    user = run_on_replica(db, functools.partial(get_user_by_id, db, user_id), user_id)
+    entry = _cache_profile(user)
+    return entry.profile, entry.etag
+
+
+def get_user_profile(db: Session, user_id: int) -> model.UserResponse:
+    """
+    Return the user's public profile, served from the user cache when possible.
+    """
+    profile, _ = get_user_profile_if_modified(db, user_id)
+    return profile
+
+
+async def get_user_by_id_async(db: AsyncSession, user_id: int) -> User:
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        lookup_logger.warning("User not found with ID: %s", user_id)
+        raise UserNotFoundError(str(user_id))
+    lookup_logger.info("Successfully retrieved user with ID: %s", user_id)
+    return user
+
+
+async def get_user_profile_if_modified_async(
+    db: AsyncSession, user_id: int, if_none_match: str | None = None
+) -> tuple[model.UserResponse | None, str]:
+    entry = await user_cache.get_async(user_id)
+    if entry is not None:
+        if etag_matches(if_none_match, entry.etag):
+            return None, entry.etag
+        return entry.profile, entry.etag
+
+    if if_none_match:
+        updated_at = await db.scalar(select(User.updated_at).where(User.id == user_id))
+        if updated_at is None:
+            raise UserNotFoundError(str(user_id))
+        etag = user_etag(user_id, updated_at)
+        if etag_matches(if_none_match, etag):
+            return None, etag
+
+    user = await get_user_by_id_async(db, user_id)
+    entry = _profile_entry(user)
+    await user_cache.set_async(entry)
+    return entry.profile, entry.etag
+
+
+async def get_user_profile_async(db: AsyncSession, user_id: int) -> model.UserResponse:
+    profile, _ = await get_user_profile_if_modified_async(db, user_id)
+    return profile
+
+
 def change_password(
     db: Session, user_id: int, password_change: model.PasswordChange
 ) -> None:
@@ -28,20 +153,124 @@ def change_password(
         user = get_user_by_id(db, user_id)
 
         if not verify_password(password_change.current_password, user.password_hash):
-            logging.warning(f"Invalid current password provided for user ID: {user_id}")
+            logger.warning("Invalid current password provided for user ID: %s", user_id)
             raise InvalidPasswordError()
 
         if password_change.new_password != password_change.new_password_confirm:
-            logging.warning(
-                f"Password mismatch during change attempt for user ID: {user_id}"
+            logger.warning(
+                "Password mismatch during change attempt for user ID: %s", user_id
             )
             raise PasswordMismatchError()
 
         user.password_hash = get_password_hash(password_change.new_password)
         db.commit()
-        logging.info(f"Successfully changed password for user ID: {user_id}")
+        mark_write(user_id)
+        user_cache.invalidate(user_id)
+        logger.info("Successfully changed password for user ID: %s", user_id)
     except Exception as e:
-        logging.error(
-            f"Error during password change for user ID: {user_id}. Error: {str(e)}"
+        logger.error(
+            "Error during password change for user ID: %s. Error: %s", user_id, e
         )
         raise
+
+
+async def change_password_async(
+    db: AsyncSession, user_id: int, password_change: model.PasswordChange
+) -> None:
+    try:
+        user = await get_user_by_id_async(db, user_id)
+
+        if not await verify_password_async(
+            password_change.current_password, user.password_hash
+        ):
+            logger.warning("Invalid current password provided for user ID: %s", user_id)
+            raise InvalidPasswordError()
+
+        if password_change.new_password != password_change.new_password_confirm:
+            logger.warning(
+                "Password mismatch during change attempt for user ID: %s", user_id
+            )
+            raise PasswordMismatchError()
+
+        user.password_hash = await get_password_hash_async(password_change.new_password)
+        await db.commit()
+        await mark_write_async(user_id)
+        await user_cache.invalidate_async(user_id)
+        logger.info("Successfully changed password for user ID: %s", user_id)
+    except Exception as e:
+        logger.error(
+            "Error during password change for user ID: %s. Error: %s", user_id, e
+        )
+        raise
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # created_at is stored as naive UTC.
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(created_at: datetime, user_id: int) -> str:
+    raw = f"{_naive_utc(created_at).isoformat()}|{user_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, user_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError()
+
+
+def list_users(
+    db: Session,
+    limit: int = 50,
+    cursor: str | None = None,
+    disabled: bool | None = None,
+    email_prefix: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+    fields: Sequence[model.UserField] | None = None,
+) -> model.UserPage:
+    """
+    Page through users newest first using keyset pagination on (created_at, id).
+
+    Each page seeks straight to the cursor position through
+    ix_users_created_at_id (or the partial ix_users_active_created_at_id for
+    active users), so deep pages cost the same as the first one. The email
+    prefix match is case-insensitive. `fields` limits both the selected
+    columns and the returned keys.
+    """
+    fields = list(dict.fromkeys(fields or model.UserResponse.model_fields))
+    columns = [getattr(User, field) for field in fields]
+
+    query = select(User.created_at, User.id, *columns)
+    if cursor is not None:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(User.created_at, User.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    if disabled is not None:
+        query = query.where(User.disabled.is_(disabled))
+    if email_prefix:
+        query = query.where(
+            func.lower(User.email).startswith(email_prefix.lower(), autoescape=True)
+        )
+    if created_after is not None:
+        query = query.where(User.created_at >= _naive_utc(created_after))
+    if created_before is not None:
+        query = query.where(User.created_at < _naive_utc(created_before))
+
+    query = query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+    rows = run_on_replica(db, lambda: db.execute(query).all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][0], rows[-1][1])
+
+    items = [dict(zip(fields, row[2:])) for row in rows]
+    return model.UserPage(items=items, next_cursor=next_cursor)
@@ -1,14 +1,19 @@
 import pytest
+import pytest_asyncio
 from fastapi import status
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from src.auth.lockout import login_lockout
 from src.auth.model import TokenData
 from src.auth.service import get_password_hash
 from src.database.core import Base
 from src.entities.user import User
+from src.idempotency import idempotency_backend
 from src.rate_limiting import limiter
+from src.users.cache import user_cache
 
 
 @pytest.fixture(scope="function")
@@ -29,6 +34,26 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest_asyncio.fixture(scope="function")
+async def async_db_session():
+    SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test_async.db"
+    engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+    TestingSessionLocal = async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
 @pytest.fixture(scope="function")
 def test_user():
     return User(
@@ -52,6 +77,9 @@ def client(db_session):
 
     # Disable rate limiting for tests
     limiter.reset()
+    login_lockout.clear()
+    user_cache.clear()
+    idempotency_backend.clear()
 
     def override_get_db():
         try:
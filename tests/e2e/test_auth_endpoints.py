@@ -1,6 +1,7 @@
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from src.auth import service as auth_service
 from src.auth.model import RegisterUserRequest
 
 
@@ -32,6 +33,71 @@ class TestAuthEndpoints:
         assert "access_token" in token_data
         assert token_data["token_type"] == "bearer"
 
+    def test_refresh_token_rotation_and_reuse(self, client: TestClient):
+        client.post(
+            "/api/v1/auth/",
+            json={
+                "email": "refresh@example.com",
+                "password": "testpassword123",
+                "first_name": "Refresh",
+                "last_name": "User",
+            },
+        )
+        login = client.post(
+            "/api/v1/auth/token",
+            data={"username": "refresh@example.com", "password": "testpassword123"},
+        ).json()
+        assert login["refresh_token"]
+
+        refreshed = client.post(
+            "/api/v1/auth/token",
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": login["refresh_token"],
+            },
+        )
+        assert refreshed.status_code == status.HTTP_200_OK
+        rotated = refreshed.json()
+        assert rotated["refresh_token"] != login["refresh_token"]
+
+        me = client.get(
+            "/api/v1/users/me",
+            headers={"Authorization": f"Bearer {rotated['access_token']}"},
+        )
+        assert me.status_code == status.HTTP_200_OK
+
+        # Replaying the rotated-out token revokes the whole family.
+        reused = client.post(
+            "/api/v1/auth/token",
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": login["refresh_token"],
+            },
+        )
+        assert reused.status_code == status.HTTP_401_UNAUTHORIZED
+
+        response = client.post(
+            "/api/v1/auth/token",
+            data={
+                "grant_type": "refresh_token",
+                "refresh_token": rotated["refresh_token"],
+            },
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        me = client.get(
+            "/api/v1/users/me",
+            headers={"Authorization": f"Bearer {rotated['access_token']}"},
+        )
+        assert me.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_refresh_with_unknown_token(self, client: TestClient):
+        response = client.post(
+            "/api/v1/auth/token",
+            data={"grant_type": "refresh_token", "refresh_token": "not-a-token"},
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
     def test_login_failures(self, client: TestClient):
         # Test login with non-existent user
         response = client.post(
@@ -83,3 +149,31 @@ class TestAuthEndpoints:
         )
 
         assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_login_lockout_skips_hashing(self, client: TestClient, monkeypatch):
+        client.post(
+            "/api/v1/auth/",
+            json={
+                "email": "locked@example.com",
+                "password": "testpassword123",
+                "first_name": "Locked",
+                "last_name": "User",
+            },
+        )
+        for _ in range(5):
+            response = client.post(
+                "/api/v1/auth/token",
+                data={"username": "locked@example.com", "password": "wrong"},
+            )
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        def fail_verify(*args, **kwargs):
+            raise AssertionError("locked accounts must not reach password hashing")
+
+        monkeypatch.setattr(auth_service, "verify_and_update_password", fail_verify)
+        response = client.post(
+            "/api/v1/auth/token",
+            data={"username": "LOCKED@example.com", "password": "testpassword123"},
+        )
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response.headers["Retry-After"]) >= 1
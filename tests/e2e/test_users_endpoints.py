@@ -1,6 +1,9 @@
 from fastapi import status
 from fastapi.testclient import TestClient
 
+from src.entities.user import User
+from src.settings import settings
+
 
 class TestUsersEndpoint:
     def test_get_current_user(self, client: TestClient, auth_headers):
@@ -82,3 +85,72 @@ class TestUsersEndpoint:
         )
 
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_list_users(self, client: TestClient, auth_headers, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+
+        response = client.get("/api/v1/users", headers=auth_headers)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = client.get(
+            "/api/v1/users",
+            params={"fields": ["id", "email"], "limit": 1},
+            headers={"X-Admin-Key": "admin-secret"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "items": [{"id": 1, "email": "test@test.com"}],
+            "next_cursor": None,
+        }
+
+        response = client.get(
+            "/api/v1/users",
+            params={"fields": "password_hash"},
+            headers={"X-Admin-Key": "admin-secret"},
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_get_current_user_conditional(self, client: TestClient, auth_headers):
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+
+        response = client.get(
+            "/api/v1/users/me", headers={**auth_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_compression(
+        self, client: TestClient, auth_headers, db_session, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+        headers = {"X-Admin-Key": "admin-secret"}
+        db_session.add_all(
+            User(
+                email=f"bulk{i}@test.com",
+                first_name="Bulk",
+                last_name="User",
+                password_hash="x",
+            )
+            for i in range(30)
+        )
+        db_session.commit()
+
+        for encoding in ("br", "gzip"):
+            response = client.get(
+                "/api/v1/users", headers={**headers, "Accept-Encoding": encoding}
+            )
+            assert response.headers["content-encoding"] == encoding
+            assert len(response.json()["items"]) > 1
+
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+        assert "content-encoding" not in response.headers, "below the threshold"
+
+        response = client.get(
+            "/api/v1/users/export",
+            params={"gzip": True},
+            headers={**headers, "Accept-Encoding": "gzip"},
+        )
+        assert "content-encoding" not in response.headers, "already compressed"
@@ -0,0 +1,79 @@
+import fnmatch
+import time
+
+
+class FakeRedis:
+    """
+    In-process stand-in for the subset of the redis-py client we use.
+    """
+
+    def __init__(self):
+        self._data: dict[str, tuple[bytes | dict, float | None]] = {}
+
+    def _alive(self, key: str) -> bool:
+        entry = self._data.get(key)
+        if entry is None:
+            return False
+        _, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return False
+        return True
+
+    def get(self, key: str) -> bytes | None:
+        return self._data[key][0] if self._alive(key) else None
+
+    def set(
+        self, key: str, value: str | bytes, ex: int | None = None, nx: bool = False
+    ) -> bool | None:
+        if nx and self._alive(key):
+            return None
+        if isinstance(value, str):
+            value = value.encode()
+        expires_at = time.monotonic() + ex if ex is not None else None
+        self._data[key] = (value, expires_at)
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        if not self._alive(key):
+            return False
+        self._data[key] = (self._data[key][0], time.monotonic() + seconds)
+        return True
+
+    def _hash(self, key: str) -> dict:
+        if not self._alive(key):
+            self._data[key] = ({}, None)
+        return self._data[key][0]
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        fields = self._hash(key)
+        fields[field] = str(int(fields.get(field, 0)) + amount).encode()
+        return int(fields[field])
+
+    def hset(self, key: str, field: str, value: str) -> int:
+        self._hash(key)[field] = str(value).encode()
+        return 1
+
+    def hget(self, key: str, field: str) -> bytes | None:
+        return self._data[key][0].get(field) if self._alive(key) else None
+
+    def scan_iter(self, match: str = "*"):
+        return [key for key in list(self._data) if fnmatch.fnmatch(key, match)]
+
+
+class FakeAsyncRedis(FakeRedis):
+    """
+    The same store behind the redis.asyncio method signatures.
+    """
+
+    async def get(self, key: str) -> bytes | None:  # type: ignore[override]
+        return super().get(key)
+
+    async def set(self, *args, **kwargs) -> bool | None:  # type: ignore[override]
+        return super().set(*args, **kwargs)
+
+    async def delete(self, *keys: str) -> int:  # type: ignore[override]
+        return super().delete(*keys)
@@ -1,13 +1,37 @@
+import threading
+import time
 from datetime import timedelta
 
 import pytest
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 
 from src.auth import service as auth_service
+from src.auth.lockout import (
+    LoginLockout,
+    MemoryLockoutBackend,
+    RedisLockoutBackend,
+)
+from src.auth.refresh_tokens import (
+    RevocationIndex,
+    issue_refresh_token,
+    revoke_family,
+    rotate_refresh_token,
+)
 from src.auth.model import RegisterUserRequest, TokenData
+from src.database.core import to_async_url
+from src.entities.refresh_token import RefreshToken
 from src.entities.user import User
-from src.exceptions import AuthenticationError
+from src.exceptions import AuthenticationError, EmailAlreadyRegisteredError
+from src.users.cache import user_cache
+from src.users.model import CachedProfile, UserResponse
+from src.users.service import user_etag
+from tests.fakes import FakeRedis
 
 
 class TestAuthService:
@@ -37,6 +61,97 @@ class TestAuthService:
         assert wrong_user is None
         assert wrong_password is None
 
+    def test_email_is_case_insensitive(self, db_session: Session, test_user: User):
+        db_session.add(test_user)
+        db_session.commit()
+
+        user = auth_service.authenticate_user(
+            " Test@TEST.com", "Testpassword124", db_session
+        )
+        assert user is not None and user.id == test_user.id
+
+        with pytest.raises(EmailAlreadyRegisteredError):
+            auth_service.register_user(
+                db_session,
+                RegisterUserRequest(
+                    email="TEST@test.com",
+                    first_name="Other",
+                    last_name="User",
+                    password="Testpassword124",
+                ),
+            )
+
+    def test_taken_email_is_rejected_before_hashing(
+        self, db_session: Session, test_user: User, monkeypatch
+    ):
+        db_session.add(test_user)
+        db_session.commit()
+        hashed = []
+        monkeypatch.setattr(auth_service, "get_password_hash", hashed.append)
+        request = RegisterUserRequest(
+            email="test@test.com",
+            first_name="Other",
+            last_name="User",
+            password="Testpassword124",
+        )
+
+        with pytest.raises(EmailAlreadyRegisteredError):
+            auth_service.register_user(db_session, request)
+        assert hashed == []
+
+        # Losing the race to a concurrent registration is a conflict too.
+        monkeypatch.setattr(auth_service, "get_password_hash", lambda p: "hash")
+        monkeypatch.setattr(auth_service, "email_matches", lambda e: User.id == -1)
+        with pytest.raises(EmailAlreadyRegisteredError):
+            auth_service.register_user(db_session, request)
+        assert db_session.query(User).count() == 1
+
+    def test_unknown_user_costs_a_verification(self, db_session: Session, monkeypatch):
+        calls = []
+        verify = auth_service.verify_password
+
+        def counting_verify(plain_password, hashed_password):
+            calls.append(hashed_password)
+            return verify(plain_password, hashed_password)
+
+        monkeypatch.setattr(auth_service, "verify_password", counting_verify)
+        assert (
+            auth_service.authenticate_user("nobody@test.com", "x", db_session) is None
+        )
+        assert calls == [auth_service.dummy_password_hash()]
+
+    def test_outdated_hash_is_upgraded_on_login(self, db_session: Session):
+        weak = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8192),))
+        user = User(
+            email="legacy@test.com",
+            first_name="Legacy",
+            last_name="User",
+            password_hash=weak.hash("Legacypassword1"),
+            disabled=False,
+        )
+        db_session.add(user)
+        db_session.commit()
+        old_hash = user.password_hash
+        user_cache.set(
+            CachedProfile(
+                profile=UserResponse.model_validate(user),
+                etag=user_etag(user.id, user.updated_at),
+            )
+        )
+
+        assert (
+            auth_service.authenticate_user(
+                "legacy@test.com", "Legacypassword1", db_session
+            )
+            is not None
+        )
+
+        db_session.refresh(user)
+        assert user.password_hash != old_hash
+        assert "m=65536,t=3" in user.password_hash
+        assert auth_service.verify_password("Legacypassword1", user.password_hash)
+        assert user_cache.get(user.id) is None
+
     def test_login_for_access_token(self, db_session: Session, test_user: User):
         db_session.add(test_user)
         db_session.commit()
@@ -97,3 +212,207 @@ class TestAuthService:
                 username="test@example.com", password="wrongpassword", scope=""
             )
             auth_service.login_for_access_token(form_data, db_session)
+
+    def test_verify_token_uses_cache(self, monkeypatch):
+        token = auth_service.create_access_token(
+            "cached@example.com", 42, expires_delta=timedelta(minutes=30)
+        )
+        assert auth_service.verify_token(token).get_user_id() == 42
+
+        def fail_decode(*args, **kwargs):
+            raise AssertionError("cached token should not be decoded again")
+
+        monkeypatch.setattr(auth_service.jwt, "decode", fail_decode)
+        assert auth_service.verify_token(token).get_user_id() == 42
+
+    def test_cached_token_rejected_at_exp(self):
+        token = auth_service.create_access_token(
+            "expiring@example.com", 43, expires_delta=timedelta(seconds=1)
+        )
+        assert auth_service.verify_token(token).get_user_id() == 43
+
+        exp = auth_service.jwt.decode(token, options={"verify_signature": False})["exp"]
+        time.sleep(max(exp - time.time(), 0))
+
+        with pytest.raises(AuthenticationError):
+            auth_service.verify_token(token)
+
+    def test_revocation_index_refresh(self, db_session: Session, test_user: User):
+        db_session.add(test_user)
+        db_session.commit()
+        _, family_id = issue_refresh_token(db_session, test_user.id)
+        _, other_family = issue_refresh_token(db_session, test_user.id)
+        db_session.commit()
+
+        revoke_family(db_session, family_id, "reuse")
+        db_session.commit()
+
+        index = RevocationIndex(
+            session_factory=None,
+            refresh_seconds=60,
+            lookback=timedelta(minutes=30),
+        )
+        assert not index.is_revoked(family_id)
+
+        index.refresh(db_session)
+        assert index.is_revoked(family_id)
+        assert not index.is_revoked(other_family)
+        assert not index.is_revoked(None)
+
+    def test_concurrent_redemptions_mint_one_successor(
+        self, db_session: Session, test_user: User, monkeypatch
+    ):
+        db_session.add(test_user)
+        db_session.commit()
+        token, family_id = issue_refresh_token(db_session, test_user.id)
+        db_session.commit()
+
+        # Both redemptions pass the revoked check before either claims the token.
+        both_checked = threading.Barrier(2, timeout=5)
+        get = Session.get
+
+        def get_after_barrier(self, *args, **kwargs):
+            both_checked.wait()
+            return get(self, *args, **kwargs)
+
+        monkeypatch.setattr(Session, "get", get_after_barrier)
+        make_session = sessionmaker(bind=db_session.get_bind())
+        results = []
+
+        def redeem():
+            with make_session() as db:
+                try:
+                    rotate_refresh_token(db, token)
+                    results.append("rotated")
+                except AuthenticationError:
+                    results.append("rejected")
+
+        threads = [threading.Thread(target=redeem) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        monkeypatch.undo()
+
+        assert sorted(results) == ["rejected", "rotated"]
+        family = db_session.scalars(
+            select(RefreshToken).where(RefreshToken.family_id == family_id)
+        ).all()
+        # The original and a single successor, both revoked as a reuse.
+        assert len(family) == 2
+        assert all(record.revoked_at is not None for record in family)
+
+    @pytest.mark.asyncio
+    async def test_register_and_authenticate_user_async(
+        self, async_db_session: AsyncSession
+    ):
+        request = RegisterUserRequest(
+            email="new@example.com",
+            password="password123",
+            first_name="New",
+            last_name="User",
+        )
+        await auth_service.register_user_async(async_db_session, request)
+
+        user = await auth_service.authenticate_user_async(
+            "new@example.com", "password123", async_db_session
+        )
+        assert user is not None
+        assert user.first_name == "New"
+
+        assert (
+            await auth_service.authenticate_user_async(
+                "new@example.com", "wrongpassword", async_db_session
+            )
+            is None
+        )
+        assert (
+            await auth_service.authenticate_user_async(
+                "missing@example.com", "password123", async_db_session
+            )
+            is None
+        )
+
+    def test_to_async_url(self):
+        assert (
+            to_async_url("postgresql://u:p@db:5432/app")
+            == "postgresql+asyncpg://u:p@db:5432/app"
+        )
+        assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+
+    def test_login_lockout_backoff(self):
+        now = [1000.0]
+        lockout = LoginLockout(
+            MemoryLockoutBackend(maxsize=100, ttl=50),
+            threshold=2,
+            base_seconds=10,
+            max_seconds=25,
+            timer=lambda: now[0],
+        )
+
+        lockout.record_failure("a@example.com")
+        assert lockout.retry_after("a@example.com") == 0
+
+        lockout.record_failure("a@example.com")
+        assert lockout.retry_after("A@example.com") == 10
+
+        lockout.record_failure("a@example.com")
+        assert lockout.retry_after("a@example.com") == 20
+
+        lockout.record_failure("a@example.com")
+        assert lockout.retry_after("a@example.com") == 25, "capped at max_seconds"
+
+        now[0] += 25
+        assert lockout.retry_after("a@example.com") == 0
+
+        lockout.reset("a@example.com")
+        lockout.record_failure("a@example.com")
+        assert lockout.retry_after("a@example.com") == 0
+
+    def test_login_lockout_is_shared_through_redis(self):
+        client = FakeRedis()
+        now = [1000.0]
+        workers = [
+            LoginLockout(
+                RedisLockoutBackend(client, ttl=50),
+                threshold=2,
+                base_seconds=10,
+                max_seconds=25,
+                timer=lambda: now[0],
+            )
+            for _ in range(2)
+        ]
+
+        # Failures on different workers add up to one lockout seen by both.
+        workers[0].record_failure("a@example.com")
+        workers[1].record_failure("A@example.com")
+        assert workers[0].retry_after("a@example.com") == 10
+        assert workers[1].retry_after("a@example.com") == 10
+
+        workers[1].reset("a@example.com")
+        assert workers[0].retry_after("a@example.com") == 0
+
+    @pytest.mark.asyncio
+    async def test_redis_lockout_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+
+        class RecordingRedis(FakeRedis):
+            def hincrby(self, *args):
+                threads.append(threading.get_ident())
+                return super().hincrby(*args)
+
+            def delete(self, *keys):
+                threads.append(threading.get_ident())
+                return super().delete(*keys)
+
+        lockout = LoginLockout(
+            RedisLockoutBackend(RecordingRedis(), ttl=50),
+            threshold=2,
+            base_seconds=10,
+            max_seconds=25,
+        )
+        await lockout.record_failure_async("a@example.com")
+        await lockout.reset_async("a@example.com")
+
+        assert len(threads) == 2 and loop_thread not in threads
@@ -0,0 +1,82 @@
+import gzip
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+from src.compression import CompressionMiddleware
+
+PAYLOAD = b"0123456789" * 200
+
+
+async def plain(request: Request):
+    size = int(request.query_params.get("size", len(PAYLOAD)))
+    return Response(PAYLOAD[:size], media_type="text/plain")
+
+
+async def streamed(request: Request):
+    async def chunks():
+        for _ in range(5):
+            yield PAYLOAD
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+async def archive(request: Request):
+    return Response(gzip.compress(PAYLOAD), media_type="application/gzip")
+
+
+app = CompressionMiddleware(
+    Starlette(
+        routes=[
+            Route("/plain", plain),
+            Route("/streamed", streamed),
+            Route("/archive", archive),
+        ]
+    ),
+    minimum_size=500,
+)
+
+
+async def get(path: str, accept_encoding: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        # httpx decodes br and gzip bodies itself.
+        return await client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+
+class TestCompressionMiddleware:
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("encoding", ["br", "gzip"])
+    async def test_response_is_compressed(self, encoding):
+        response = await get("/plain", f"{encoding}, identity")
+
+        assert response.headers["content-encoding"] == encoding
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(PAYLOAD)
+        assert response.content == PAYLOAD
+
+    @pytest.mark.asyncio
+    async def test_streamed_response_is_compressed(self):
+        response = await get("/streamed", "gzip")
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert response.content == PAYLOAD * 5
+
+    @pytest.mark.asyncio
+    async def test_passed_through(self):
+        small = await get("/plain?size=100", "br")
+        assert "content-encoding" not in small.headers
+        assert small.content == PAYLOAD[:100]
+
+        archive = await get("/archive", "gzip")
+        assert "content-encoding" not in archive.headers
+        assert gzip.decompress(archive.content) == PAYLOAD
+
+        identity = await get("/plain", "identity")
+        assert "content-encoding" not in identity.headers
+        assert identity.content == PAYLOAD
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+
+from src.database import pool as db_pool
+from src.settings import settings
+
+
+def sample(name: str, pool: str) -> float | None:
+    return REGISTRY.get_sample_value(name, {"pool": pool})
+
+
+class TestConnectionPool:
+    def test_engine_options_for_postgres(self, monkeypatch):
+        monkeypatch.setattr(settings, "DB_POOL_SIZE", 20)
+        monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+        options = db_pool.engine_options("postgresql://u:p@db/app")
+        assert options["poolclass"] is db_pool.InstrumentedQueuePool
+        assert options["pool_size"] == 20
+        assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+        async_options = db_pool.engine_options(
+            "postgresql+asyncpg://u:p@db/app", is_async=True
+        )
+        assert async_options["poolclass"] is db_pool.InstrumentedAsyncQueuePool
+        assert async_options["connect_args"] == {
+            "server_settings": {"statement_timeout": "5000"}
+        }
+
+    def test_engine_options_for_sqlite(self):
+        options = db_pool.engine_options("sqlite:///./test.db")
+        assert "poolclass" not in options
+        assert "pool_size" not in options
+
+    def test_pool_metrics_and_slow_checkout(self, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "DB_POOL_SLOW_CHECKOUT_MS", 0)
+        engine = create_engine(
+            "sqlite:///./test_pool.db",
+            poolclass=db_pool.InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+            pool_logging_name="test_pool",
+        )
+        db_pool.instrument_pool(engine)
+
+        try:
+            with caplog.at_level(logging.WARNING):
+                conn = engine.connect()
+            assert "Slow connection checkout from 'test_pool'" in caplog.text
+            assert sample("db_pool_checked_out_connections", "test_pool") == 1
+            assert sample("db_pool_connections_created_total", "test_pool") == 1
+
+            with pytest.raises(sa_exc.TimeoutError):
+                engine.connect()
+            assert sample("db_pool_checkout_timeouts_total", "test_pool") == 1
+
+            conn.close()
+            assert sample("db_pool_checked_out_connections", "test_pool") == 0
+            assert sample("db_pool_checkout_wait_seconds_count", "test_pool") == 2
+        finally:
+            engine.dispose()
+
+    def test_pool_gauges_in_multiprocess_mode(self, tmp_path):
+        # prometheus_client picks its value store on import, so this runs in a
+        # fresh interpreter with PROMETHEUS_MULTIPROC_DIR set.
+        child = f"""
+import json
+from prometheus_client import CollectorRegistry
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import create_engine
+from src.database import pool as db_pool
+
+engine = create_engine(
+    "sqlite:///{tmp_path}/pool.db",
+    poolclass=db_pool.InstrumentedQueuePool,
+    pool_size=1,
+    max_overflow=1,
+    pool_logging_name="mp",
+)
+db_pool.instrument_pool(engine)
+
+def scrape():
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return [
+        registry.get_sample_value(name, {{"pool": "mp"}})
+        for name in (
+            "db_pool_checked_out_connections",
+            "db_pool_overflow_connections",
+        )
+    ]
+
+first, second = engine.connect(), engine.connect()
+samples = [scrape()]
+first.close()
+samples.append(scrape())
+second.close()
+samples.append(scrape())
+print(json.dumps(samples))
+"""
+        metrics_dir = tmp_path / "metrics"
+        metrics_dir.mkdir()
+        env = {"PROMETHEUS_MULTIPROC_DIR": str(metrics_dir)}
+        result = subprocess.run(
+            [sys.executable, "-c", child],
+            env={**os.environ, **env},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # [checked out, overflow] with two, one and no connections out.
+        assert json.loads(result.stdout) == [[2, 1], [1, 1], [0, 0]]
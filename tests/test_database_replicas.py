@@ -0,0 +1,142 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from src.database import replicas
+from src.database.core import Base
+from src.entities.user import User
+from src.users import service as user_service
+from src.users.cache import user_cache
+from tests.fakes import FakeRedis
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def add_user(engine, last_name: str) -> None:
+    with sessionmaker(bind=engine)() as db:
+        db.add(
+            User(
+                id=1,
+                email="replica@test.com",
+                first_name="Replica",
+                last_name=last_name,
+                password_hash="x",
+            )
+        )
+        db.commit()
+
+
+@pytest.fixture
+def primary(tmp_path):
+    engine = make_engine(tmp_path / "primary.db")
+    add_user(engine, "Primary")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replica_engines(tmp_path, monkeypatch):
+    engines = [make_engine(tmp_path / f"replica{i}.db") for i in range(2)]
+    for i, engine in enumerate(engines):
+        add_user(engine, f"Replica{i}")
+    monkeypatch.setattr(
+        replicas, "replica_set", replicas.ReplicaSet(engines, eject_seconds=60)
+    )
+    replicas.write_pins.clear()
+    user_cache.clear()
+    yield engines
+    for engine in engines:
+        engine.dispose()
+
+
+@pytest.fixture
+def db(primary):
+    session = sessionmaker(class_=replicas.RoutingSession, bind=primary)()
+    yield session
+    session.close()
+
+
+class TestReadReplicas:
+    def test_reads_round_robin_over_replicas(self, db, replica_engines):
+        def read_name():
+            db.expunge_all()
+            return db.get(User, 1).last_name
+
+        names = [replicas.run_on_replica(db, read_name) for _ in range(4)]
+        assert names == ["Replica0", "Replica1", "Replica0", "Replica1"]
+        assert read_name() == "Primary", "reads outside a block use the primary"
+
+    def test_writes_go_to_primary(self, db, primary, replica_engines):
+        with replicas.replica(db):
+            db.add(
+                User(
+                    email="new@test.com",
+                    first_name="New",
+                    last_name="User",
+                    password_hash="x",
+                )
+            )
+            db.flush()
+        db.commit()
+
+        with sessionmaker(bind=primary)() as check:
+            assert check.query(User).filter_by(email="new@test.com").count() == 1
+
+    def test_read_your_writes(self, db, replica_engines):
+        profile = user_service.get_user_profile(db, 1)
+        assert profile.last_name.startswith("Replica")
+
+        user_cache.clear()
+        db.expunge_all()
+        replicas.mark_write(1)
+        assert user_service.get_user_profile(db, 1).last_name == "Primary"
+
+    def test_write_pins_are_shared_through_redis(
+        self, db, replica_engines, monkeypatch
+    ):
+        client = FakeRedis()
+        # Another worker made the write; this one only shares its redis.
+        replicas.RedisWritePins(client, ttl=5).pin(1)
+        monkeypatch.setattr(replicas, "write_pins", replicas.RedisWritePins(client, 5))
+
+        with replicas.replica(db, user_id=1) as engine:
+            assert engine is None
+        with replicas.replica(db, user_id=2) as engine:
+            assert engine is not None
+
+    def test_unavailable_pins_read_the_primary(self, db, replica_engines, monkeypatch):
+        class Down:
+            def get(self, key):
+                raise ConnectionError("redis is down")
+
+        monkeypatch.setattr(replicas, "write_pins", replicas.RedisWritePins(Down(), 5))
+        with replicas.replica(db, user_id=1) as engine:
+            assert engine is None
+
+    def test_statement_errors_keep_the_replica(self, db, replica_engines):
+        with pytest.raises(OperationalError):
+            replicas.run_on_replica(
+                db, lambda: db.execute(text("SELECT * FROM missing_table"))
+            )
+        assert all(
+            not replicas.replica_set.is_ejected(engine) for engine in replica_engines
+        )
+
+    def test_failed_replica_is_ejected(self, db, tmp_path, monkeypatch):
+        broken = create_engine(f"sqlite:///{tmp_path}/missing/replica.db")
+        replica_set = replicas.ReplicaSet([broken], eject_seconds=60)
+        monkeypatch.setattr(replicas, "replica_set", replica_set)
+
+        name = replicas.run_on_replica(db, lambda: db.get(User, 1).last_name)
+        assert name == "Primary"
+        assert replica_set.choose() is None
+
+    def test_plain_sessions_stay_on_primary(self, primary, replica_engines):
+        with sessionmaker(bind=primary)() as db:
+            with replicas.replica(db) as engine:
+                assert engine is None
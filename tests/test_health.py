@@ -0,0 +1,103 @@
+import os
+import signal
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import QueuePool
+
+from src.health import ReadinessProbe, drain_on_sigterm, readiness
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def probe_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/probe.db", poolclass=QueuePool)
+    executed = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, many):
+        executed.append(statement)
+
+    engine.executed = executed
+    yield engine
+    engine.dispose()
+
+
+class TestReadinessProbe:
+    def test_results_are_cached(self, probe_engine):
+        timer = FakeTimer()
+        probe = ReadinessProbe(probe_engine, 2.0, pool_capacity=5, timer=timer)
+
+        for _ in range(100):
+            assert probe.check() == (True, {"pool": "ok", "database": "ok"})
+        assert len(probe_engine.executed) == 1
+
+        timer.now = 2.5
+        probe.check()
+        assert len(probe_engine.executed) == 2
+
+    def test_saturated_pool_is_not_ready(self, probe_engine):
+        probe = ReadinessProbe(probe_engine, 2.0, pool_capacity=1)
+        with probe_engine.connect():
+            ready, checks = probe.check()
+        assert not ready
+        assert checks["pool"] == "saturated (1/1)"
+        assert probe_engine.executed == []
+
+    def test_unreachable_database(self):
+        engine = create_engine("sqlite:////nonexistent/dir/db.sqlite")
+        ready, checks = ReadinessProbe(engine, 2.0, pool_capacity=5).check()
+        assert not ready
+        assert checks["database"] == "unreachable"
+
+    @pytest.mark.asyncio
+    async def test_sigterm_fails_readiness_before_shutdown(self, probe_engine):
+        received = []
+        previous = signal.signal(signal.SIGTERM, lambda s, f: received.append(s))
+        try:
+            probe = ReadinessProbe(probe_engine, 2.0, pool_capacity=5)
+            drain_on_sigterm(probe, delay=60)
+
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert probe.check() == (False, {"shutdown": "draining"})
+            assert received == []
+
+            # A second SIGTERM skips the drain.
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert received == [signal.SIGTERM]
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+
+class TestHealthEndpoints:
+    def test_healthz(self, client: TestClient):
+        response = client.get("/healthz")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"status": "ok"}
+
+    def test_readyz(self, client: TestClient):
+        readiness.clear()
+        response = client.get("/readyz")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {
+            "status": "ready",
+            "checks": {"pool": "ok", "database": "ok"},
+        }
+
+    def test_readyz_while_draining(self, client: TestClient):
+        readiness.draining = True
+        try:
+            response = client.get("/readyz")
+        finally:
+            readiness.clear()
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["status"] == "unavailable"
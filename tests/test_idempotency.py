@@ -0,0 +1,220 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from src.entities.user import User
+from src.idempotency import (
+    IdempotencyMiddleware,
+    IdempotencyRecord,
+    MemoryIdempotencyBackend,
+    RedisIdempotencyBackend,
+)
+from tests.fakes import FakeAsyncRedis
+
+REGISTRATION = {
+    "email": "retry@example.com",
+    "password": "Testpassword124",
+    "first_name": "Retry",
+    "last_name": "User",
+}
+
+
+def build_app(backend, handler):
+    app = Starlette(routes=[Route("/", handler, methods=["POST"])])
+    return IdempotencyMiddleware(app, backend=backend, max_body_size=1024)
+
+
+def memory_backend():
+    return MemoryIdempotencyBackend(maxsize=100, ttl=60, lock_ttl=60)
+
+
+class TestIdempotentRegistration:
+    def test_retry_replays_the_original_response(self, client: TestClient, db_session):
+        headers = {"Idempotency-Key": "8c6b1f52-4a1d-4c6e-9d0e-0f3b2a7c9e11"}
+
+        first = client.post("/api/v1/auth/", json=REGISTRATION, headers=headers)
+        retry = client.post("/api/v1/auth/", json=REGISTRATION, headers=headers)
+
+        assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+        assert "idempotent-replayed" not in first.headers
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert retry.content == first.content
+        assert db_session.query(User).count() == 1
+
+    def test_key_reused_with_another_body(self, client: TestClient):
+        headers = {"Idempotency-Key": "key-1"}
+        client.post("/api/v1/auth/", json=REGISTRATION, headers=headers)
+
+        response = client.post(
+            "/api/v1/auth/",
+            json={**REGISTRATION, "email": "other@example.com"},
+            headers=headers,
+        )
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_taken_email_is_a_conflict(self, client: TestClient):
+        client.post("/api/v1/auth/", json=REGISTRATION)
+
+        response = client.post(
+            "/api/v1/auth/",
+            json={**REGISTRATION, "email": "RETRY@example.com"},
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.json() == {"detail": "Email already registered"}
+
+    def test_token_responses_are_not_stored(self, client: TestClient):
+        client.post("/api/v1/auth/", json=REGISTRATION)
+        form = {"username": REGISTRATION["email"], "password": "Testpassword124"}
+        headers = {"Idempotency-Key": "login-1"}
+
+        first = client.post("/api/v1/auth/token", data=form, headers=headers)
+        second = client.post("/api/v1/auth/token", data=form, headers=headers)
+
+        assert first.headers["cache-control"] == "no-store"
+        assert "idempotent-replayed" not in second.headers
+        assert first.json()["refresh_token"] != second.json()["refresh_token"]
+
+    def test_invalid_key(self, client: TestClient):
+        response = client.post(
+            "/api/v1/auth/", json=REGISTRATION, headers={"Idempotency-Key": "a b"}
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestIdempotencyMiddleware:
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicate_is_a_conflict(self):
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow(request: Request):
+            started.set()
+            await release.wait()
+            return JSONResponse({"ok": True}, status_code=201)
+
+        transport = httpx.ASGITransport(app=build_app(memory_backend(), slow))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            headers = {"Idempotency-Key": "k"}
+            first = asyncio.create_task(c.post("/", content=b"x", headers=headers))
+            await started.wait()
+
+            duplicate = await c.post("/", content=b"x", headers=headers)
+            assert duplicate.status_code == status.HTTP_409_CONFLICT
+            assert duplicate.headers["retry-after"] == "1"
+
+            release.set()
+            assert (await first).status_code == 201
+            replayed = await c.post("/", content=b"x", headers=headers)
+            assert replayed.headers["idempotent-replayed"] == "true"
+
+    @pytest.mark.asyncio
+    async def test_key_reused_with_another_query_string(self):
+        async def echo(request: Request):
+            return JSONResponse(dict(request.query_params), status_code=201)
+
+        transport = httpx.ASGITransport(app=build_app(memory_backend(), echo))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            headers = {"Idempotency-Key": "k"}
+            first = await c.post("/?format=ndjson", content=b"x", headers=headers)
+            other = await c.post("/?format=csv", content=b"x", headers=headers)
+
+        assert first.json() == {"format": "ndjson"}
+        assert other.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    @pytest.mark.asyncio
+    async def test_server_errors_are_not_stored(self):
+        calls = []
+
+        async def failing(request: Request):
+            calls.append(await request.body())
+            return JSONResponse({}, status_code=503)
+
+        transport = httpx.ASGITransport(app=build_app(memory_backend(), failing))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            for _ in range(2):
+                response = await c.post(
+                    "/", content=b"body", headers={"Idempotency-Key": "k"}
+                )
+                assert response.status_code == 503
+        assert calls == [b"body", b"body"]
+
+    @pytest.mark.asyncio
+    async def test_disconnect_mid_body_does_not_claim_the_key(self):
+        calls = []
+
+        async def create(request: Request):
+            calls.append(await request.body())
+            return JSONResponse({}, status_code=201)
+
+        app = build_app(memory_backend(), create)
+        messages = iter(
+            [
+                {"type": "http.request", "body": b"par", "more_body": True},
+                {"type": "http.disconnect"},
+            ]
+        )
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/",
+            "query_string": b"",
+            "headers": [(b"idempotency-key", b"k")],
+        }
+        await app(scope, receive, send)
+        assert calls == [] and sent == []
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            retry = await c.post(
+                "/", content=b"partial", headers={"Idempotency-Key": "k"}
+            )
+        assert retry.status_code == 201
+        assert calls == [b"partial"]
+
+    @pytest.mark.asyncio
+    async def test_oversized_body_is_rejected(self):
+        async def ok(request: Request):
+            return JSONResponse({})
+
+        transport = httpx.ASGITransport(app=build_app(memory_backend(), ok))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            response = await c.post(
+                "/", content=b"x" * 2048, headers={"Idempotency-Key": "k"}
+            )
+        assert response.status_code == status.HTTP_413_CONTENT_TOO_LARGE
+
+
+class TestRedisIdempotencyBackend:
+    @pytest.mark.asyncio
+    async def test_reserve_complete_and_release(self):
+        backend = RedisIdempotencyBackend(FakeAsyncRedis(), ttl=60, lock_ttl=5)
+        pending = IdempotencyRecord(fingerprint="f")
+
+        assert await backend.reserve("k", pending) is None
+        assert await backend.reserve("k", pending) == pending
+
+        done = IdempotencyRecord(
+            fingerprint="f",
+            status_code=201,
+            headers=[("content-type", "application/json")],
+            body=b"\x00\xff",
+        )
+        await backend.complete("k", done)
+        assert await backend.reserve("k", pending) == done
+
+        await backend.release("k")
+        assert await backend.reserve("k", pending) is None
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from src.auth import keys
+from src.auth import service as auth_service
+from src.exceptions import AuthenticationError
+
+
+def write_private_key(path, key):
+    path.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+
+
+def write_public_key(path, key):
+    path.write_bytes(
+        key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+    )
+
+
+@pytest.fixture
+def eddsa_store(tmp_path, monkeypatch):
+    write_private_key(tmp_path / "2026-01.pem", ed25519.Ed25519PrivateKey.generate())
+    store = keys.KeyStore("EdDSA", "unused", str(tmp_path), reload_seconds=0)
+    monkeypatch.setattr(auth_service, "key_store", store)
+    auth_service.token_cache.clear()
+    yield store
+    auth_service.token_cache.clear()
+
+
+class TestJwtKeys:
+    def test_eddsa_tokens_carry_kid(self, eddsa_store):
+        token = auth_service.create_access_token(
+            "a@example.com", 5, expires_delta=timedelta(minutes=5)
+        )
+        header = jwt.get_unverified_header(token)
+        assert header == {"alg": "EdDSA", "kid": "2026-01", "typ": "JWT"}
+        assert auth_service.verify_token(token).get_user_id() == 5
+
+    def test_rotation_without_restart(self, eddsa_store, tmp_path):
+        old_token = auth_service.create_access_token(
+            "a@example.com", 5, expires_delta=timedelta(minutes=5)
+        )
+
+        old_key = serialization.load_pem_private_key(
+            (tmp_path / "2026-01.pem").read_bytes(), password=None
+        )
+        write_public_key(tmp_path / "2026-01.pub.pem", old_key)
+        (tmp_path / "2026-01.pem").unlink()
+        write_private_key(
+            tmp_path / "2026-02.pem", ed25519.Ed25519PrivateKey.generate()
+        )
+
+        new_token = auth_service.create_access_token(
+            "a@example.com", 6, expires_delta=timedelta(minutes=5)
+        )
+        assert jwt.get_unverified_header(new_token)["kid"] == "2026-02"
+        assert auth_service.verify_token(new_token).get_user_id() == 6
+        assert auth_service.verify_token(old_token).get_user_id() == 5
+
+        jwks = eddsa_store.get().jwks()
+        assert [key["kid"] for key in jwks["keys"]] == ["2026-01", "2026-02"]
+        assert all(
+            key["kty"] == "OKP" and key["alg"] == "EdDSA" for key in jwks["keys"]
+        )
+        assert all("d" not in key for key in jwks["keys"])
+
+    def test_unknown_kid_rejected(self, eddsa_store):
+        other = ed25519.Ed25519PrivateKey.generate()
+        token = jwt.encode(
+            {"id": "5", "sub": "a@example.com"},
+            other,
+            algorithm="EdDSA",
+            headers={"kid": "missing"},
+        )
+        with pytest.raises(AuthenticationError):
+            auth_service.verify_token(token)
+
+    def test_es256_requires_p256(self, tmp_path):
+        write_private_key(tmp_path / "k1.pem", ec.generate_private_key(ec.SECP384R1()))
+        with pytest.raises(ValueError):
+            keys.load_key_set("ES256", tmp_path)
+
+        (tmp_path / "k1.pem").unlink()
+        write_private_key(tmp_path / "k1.pem", ec.generate_private_key(ec.SECP256R1()))
+        key_set = keys.load_key_set("ES256", tmp_path)
+        assert key_set.signing_kid == "k1"
+        assert key_set.jwks()["keys"][0]["crv"] == "P-256"
+
+    def test_jwks_endpoint(self, client: TestClient):
+        response = client.get("/api/v1/auth/jwks.json")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"keys": []}
+        assert "max-age" in response.headers["Cache-Control"]
@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+import src.main
+from src.auth.service import dummy_password_hash
+from src.database.core import engine
+from src.main import app
+
+
+class TestLifespan:
+    def test_warm_up_and_dispose(self):
+        dummy_password_hash.cache_clear()
+        with TestClient(app):
+            assert engine.pool.checkedin() >= 1
+            assert dummy_password_hash.cache_info().currsize == 1
+        assert engine.pool.checkedin() == 0
+
+    def test_database_failure_does_not_block_startup(self, monkeypatch, caplog):
+        def unreachable() -> None:
+            raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+        monkeypatch.setattr(src.main, "warm_up_pool", unreachable)
+        with TestClient(app) as client:
+            assert client.get("/metrics").status_code == 200
+        assert "Database warm-up failed" in caplog.text
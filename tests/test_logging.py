@@ -0,0 +1,103 @@
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.logging_config import (
+    JSONFormatter,
+    LogLevels,
+    LogSampler,
+    RequestIdMiddleware,
+    configure_logging,
+    request_id_var,
+    stop_logging,
+    trace_id_var,
+)
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    stop_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+class TestLogging:
+    def test_json_lines_carry_request_context(self, root_logger, capsys):
+        configure_logging(LogLevels.INFO, "json")
+        logger = logging.getLogger("tests.logging")
+
+        request_token = request_id_var.set("req-1")
+        trace_token = trace_id_var.set("ab" * 16)
+        try:
+            logger.info("Hello %s", "world", extra={"user_id": 7})
+            try:
+                raise ValueError("boom")
+            except ValueError:
+                logger.exception("Failed")
+            logger.debug("Dropped by level")
+        finally:
+            trace_id_var.reset(trace_token)
+            request_id_var.reset(request_token)
+        stop_logging()
+
+        lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+        assert [line["message"] for line in lines] == ["Hello world", "Failed"]
+        assert lines[0]["level"] == "INFO"
+        assert lines[0]["logger"] == "tests.logging"
+        assert lines[0]["request_id"] == "req-1"
+        assert lines[0]["trace_id"] == "ab" * 16
+        assert lines[0]["user_id"] == 7
+        assert "ValueError: boom" in lines[1]["exception"]
+
+    def test_formatter_omits_missing_context(self):
+        record = logging.LogRecord("x", logging.INFO, __file__, 1, "hi", None, None)
+        entry = json.loads(JSONFormatter().format(record))
+        assert entry["message"] == "hi"
+        assert "request_id" not in entry and "trace_id" not in entry
+
+    def test_sampler_keeps_warnings(self):
+        sampler = LogSampler(0.0)
+
+        def record(level: int) -> logging.LogRecord:
+            return logging.LogRecord("x", level, __file__, 1, "msg", None, None)
+
+        assert not sampler.filter(record(logging.INFO))
+        assert sampler.filter(record(logging.WARNING))
+        assert LogSampler(1.0).filter(record(logging.INFO))
+
+
+class TestRequestIdMiddleware:
+    @pytest.fixture
+    def client(self) -> TestClient:
+        app = FastAPI()
+
+        @app.get("/ids")
+        def ids():
+            return {"request_id": request_id_var.get(), "trace_id": trace_id_var.get()}
+
+        app.add_middleware(RequestIdMiddleware)
+        return TestClient(app)
+
+    def test_incoming_ids_are_kept(self, client: TestClient):
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        response = client.get(
+            "/ids",
+            headers={
+                "X-Request-ID": "abc-123",
+                "traceparent": f"00-{trace_id}-00f067aa0ba902b7-01",
+            },
+        )
+        assert response.headers["x-request-id"] == "abc-123"
+        assert response.json() == {"request_id": "abc-123", "trace_id": trace_id}
+
+    def test_missing_or_invalid_request_id_is_generated(self, client: TestClient):
+        response = client.get("/ids", headers={"X-Request-ID": "bad id\x7f"})
+        request_id = response.headers["x-request-id"]
+        assert len(request_id) == 32 and request_id != "bad id"
+        assert response.json() == {"request_id": request_id, "trace_id": None}
@@ -0,0 +1,47 @@
+import re
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from src.metrics import track_queries
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetrics:
+    def test_server_timing_and_route_metrics(
+        self, client: TestClient, db_session, auth_headers
+    ):
+        track_queries(db_session.get_bind())
+        route = "/api/v1/users/me"
+        before = sample("http_responses_total", method="GET", route=route, status="200")
+
+        response = client.get(route, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        timing = response.headers["server-timing"]
+        match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing)
+        assert match and int(match.group(1)) >= 1
+        assert "app;dur=" in timing and "hash;dur=" in timing
+
+        assert (
+            sample("http_responses_total", method="GET", route=route, status="200")
+            == before + 1
+        )
+        assert sample("http_request_duration_seconds_count", method="GET", route=route)
+        assert sample("password_hash_duration_seconds_count", operation="hash_password")
+
+    def test_unmatched_routes_share_a_label(self, client: TestClient):
+        client.get("/no/such/path/123")
+        assert sample(
+            "http_responses_total", method="GET", route="unmatched", status="404"
+        )
+
+    def test_metrics_endpoint(self, client: TestClient):
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert "http_requests_in_progress" in response.text
+        assert "db_pool_checked_out_connections" in response.text
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from src.auth import hashing
+from src.auth import service as auth_service
+from src.exceptions import ServiceUnavailableError
+
+
+class TestHashingExecutor:
+    def test_run_returns_result(self):
+        executor = hashing.HashingExecutor(max_workers=1, queue_depth=0)
+        try:
+            hashed = executor.run(hashing.hash_password, "Testpassword123")
+            assert executor.run(hashing.check_password, "Testpassword123", hashed)
+            assert executor.pending == 0
+        finally:
+            executor.shutdown()
+
+    def test_process_pool_uses_spawn(self):
+        executor = hashing.HashingExecutor(kind="process", max_workers=1)
+        try:
+            hashed = executor.run(hashing.hash_password, "Testpassword123")
+            assert executor.run(hashing.check_password, "Testpassword123", hashed)
+            assert executor._executor._mp_context.get_start_method() == "spawn"
+        finally:
+            executor.shutdown()
+
+    def test_rejects_when_saturated(self):
+        executor = hashing.HashingExecutor(max_workers=1, queue_depth=1, retry_after=7)
+        release = threading.Event()
+        try:
+            executor.submit(release.wait)
+            executor.submit(release.wait)
+
+            with pytest.raises(ServiceUnavailableError) as exc_info:
+                executor.submit(release.wait)
+
+            assert exc_info.value.status_code == 503
+            assert exc_info.value.headers == {"Retry-After": "7"}
+        finally:
+            release.set()
+            executor.shutdown()
+
+        assert executor.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_async_helpers(self):
+        hashed = await auth_service.get_password_hash_async("Testpassword123")
+        assert await auth_service.verify_password_async("Testpassword123", hashed)
+        assert not await auth_service.verify_password_async("Wrong1234", hashed)
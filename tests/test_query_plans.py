@@ -0,0 +1,88 @@
+"""
+Guards that the hot user queries keep hitting their indexes.
+
+Each test captures the SQL the service actually emits and runs it through
+SQLite's EXPLAIN QUERY PLAN.
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from src.auth import service as auth_service
+from src.entities.user import User
+from src.users import service as user_service
+
+
+@contextmanager
+def captured_statements(db_session: Session):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(db_session: Session, statement: str, parameters) -> str:
+    connection = db_session.connection()
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    return "\n".join(row[-1] for row in rows)
+
+
+class TestQueryPlans:
+    @pytest.fixture(autouse=True)
+    def users(self, db_session: Session):
+        password_hash = auth_service.get_password_hash("Planpassword1")
+        db_session.add_all(
+            User(
+                email=f"Plan{i}@Test.com",
+                first_name="Plan",
+                last_name=str(i),
+                password_hash=password_hash,
+                disabled=i % 3 == 0,
+            )
+            for i in range(20)
+        )
+        db_session.commit()
+        db_session.execute(text("ANALYZE"))
+
+    def test_authenticate_uses_lower_email_index(self, db_session: Session):
+        with captured_statements(db_session) as statements:
+            auth_service.authenticate_user("plan7@test.COM", "wrong", db_session)
+
+        plan = query_plan(db_session, *statements[0])
+        assert "USING INDEX ix_users_email_lower" in plan
+
+    def test_active_listing_uses_partial_index(self, db_session: Session):
+        with captured_statements(db_session) as statements:
+            page = user_service.list_users(db_session, limit=5, disabled=False)
+            user_service.list_users(
+                db_session, limit=5, disabled=False, cursor=page.next_cursor
+            )
+
+        for statement in statements:
+            plan = query_plan(db_session, *statement)
+            assert "ix_users_active_created_at_id" in plan
+            assert "TEMP B-TREE" not in plan, "ORDER BY must come from the index"
+
+    def test_created_range_uses_created_at_index(self, db_session: Session):
+        with captured_statements(db_session) as statements:
+            user_service.list_users(
+                db_session,
+                created_after=datetime(2024, 1, 1),
+                created_before=datetime(2100, 1, 1),
+            )
+
+        plan = query_plan(db_session, *statements[0])
+        assert "ix_users_created_at_id" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,47 @@
+import time
+
+from fastapi import FastAPI, Request, status
+from fastapi.testclient import TestClient
+
+from src.rate_limiting import build_limiter, storage_options
+
+
+def make_app(limiter) -> FastAPI:
+    app = FastAPI()
+    app.state.limiter = limiter
+
+    @app.get("/limited")
+    @limiter.limit("2/minute")
+    def limited(request: Request):
+        return {"ok": True}
+
+    return app
+
+
+class TestRateLimiting:
+    def test_storage_options(self):
+        assert storage_options("redis://cache:6379/1", 5) == {
+            "socket_timeout": 0.005,
+            "socket_connect_timeout": 0.005,
+        }
+        assert storage_options("memory://", 5) == {}
+
+    def test_moving_window_strategy(self):
+        limiter = build_limiter(storage_uri="memory://", strategy="moving-window")
+        client = TestClient(make_app(limiter))
+
+        assert client.get("/limited").status_code == status.HTTP_200_OK
+        assert client.get("/limited").status_code == status.HTTP_200_OK
+        assert client.get("/limited").status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_fails_open_when_storage_is_down(self):
+        # Nothing listens on port 1, so every storage call fails.
+        limiter = build_limiter(
+            storage_uri="redis://127.0.0.1:1/0", fail_open=True, timeout_ms=50
+        )
+        client = TestClient(make_app(limiter))
+
+        start = time.perf_counter()
+        for _ in range(3):
+            assert client.get("/limited").status_code == status.HTTP_200_OK
+        assert time.perf_counter() - start < 1.0
@@ -0,0 +1,35 @@
+import os
+
+from src.server import Worker, default_workers, prepare_multiprocess_metrics
+from src.settings import settings
+
+
+class TestServer:
+    def test_worker_config(self):
+        assert Worker.CONFIG_KWARGS["loop"] == "uvloop"
+        assert Worker.CONFIG_KWARGS["http"] == "httptools"
+        assert (
+            Worker.CONFIG_KWARGS["timeout_graceful_shutdown"]
+            == settings.SERVER_GRACEFUL_TIMEOUT_SECONDS
+        )
+
+    def test_default_workers(self):
+        assert 1 <= default_workers() <= (os.cpu_count() or 1)
+
+    def test_multiprocess_dir_is_cleared(self, tmp_path, monkeypatch):
+        stale = tmp_path / "counter_123.db"
+        stale.write_bytes(b"")
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+        prepare_multiprocess_metrics()
+        assert not stale.exists()
+
+    def test_multiprocess_dir_is_created(self, monkeypatch):
+        # Set first so monkeypatch removes the variable again afterwards.
+        monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+        monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR")
+
+        prepare_multiprocess_metrics()
+        directory = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+        assert os.path.isdir(directory)
+        os.rmdir(directory)
@@ -0,0 +1,71 @@
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from src.metrics import track_queries
+from src.tracing import configure_tracing, shutdown_tracing
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    yield exporter
+    shutdown_tracing()
+
+
+class TestTracing:
+    def test_request_spans(
+        self, client: TestClient, db_session, auth_headers, exporter
+    ):
+        track_queries(db_session.get_bind())
+        configure_tracing(exporter, sample_ratio=1.0)
+
+        response = client.get("/api/v1/users/me", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        root = spans["GET /api/v1/users/me"]
+        assert root.attributes["http.route"] == "/api/v1/users/me"
+        assert root.attributes["http.response.status_code"] == 200
+        assert "jwt.decode" in spans
+        assert spans["SELECT"].attributes["db.system"] == "sqlite"
+        assert all(
+            span.context.trace_id == root.context.trace_id for span in spans.values()
+        )
+        assert spans["SELECT"].parent.span_id == root.context.span_id
+
+    def test_hashing_spans(self, client: TestClient, db_session, exporter):
+        configure_tracing(exporter, sample_ratio=1.0)
+        client.post(
+            "/api/v1/auth/",
+            json={
+                "email": "trace@example.com",
+                "password": "password123",
+                "first_name": "Trace",
+                "last_name": "User",
+            },
+        )
+        names = [span.name for span in exporter.get_finished_spans()]
+        assert "password.hash_password" in names
+
+    def test_head_sampling(self, client: TestClient, exporter):
+        configure_tracing(exporter, sample_ratio=0.0)
+        client.get("/metrics")
+        assert exporter.get_finished_spans() == ()
+
+        # An upstream sampling decision is honoured regardless of the ratio.
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        client.get(
+            "/metrics", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"}
+        )
+        (span,) = exporter.get_finished_spans()
+        assert span.name == "GET /metrics"
+        assert format(span.context.trace_id, "032x") == trace_id
+
+    def test_disabled_by_default(self, client: TestClient, exporter):
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert exporter.get_finished_spans() == ()
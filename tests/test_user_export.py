@@ -0,0 +1,72 @@
+import csv
+import gzip
+import io
+import json
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.entities.user import User
+from src.settings import settings
+from src.users import exporter
+
+
+def add_users(db_session: Session, count: int) -> None:
+    db_session.add_all(
+        User(
+            email=f"export{i}@test.com",
+            first_name="Export",
+            last_name=str(i),
+            password_hash="secret-hash",
+        )
+        for i in range(count)
+    )
+    db_session.commit()
+
+
+class TestUserExport:
+    def test_export_ndjson_in_chunks(self, db_session: Session):
+        add_users(db_session, 25)
+
+        chunks = list(
+            exporter.export_users(db_session, "ndjson", batch_size=4, chunk_bytes=500)
+        )
+        assert len(chunks) > 1
+
+        rows = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+        assert [row["last_name"] for row in rows] == [str(i) for i in range(25)]
+        assert set(rows[0]) == set(exporter.EXPORT_FIELDS)
+        assert "password_hash" not in rows[0]
+
+    def test_export_csv_gzip(self, db_session: Session):
+        add_users(db_session, 3)
+
+        data = gzip.decompress(
+            b"".join(exporter.export_users(db_session, "csv", gzip=True))
+        )
+        rows = list(csv.DictReader(io.StringIO(data.decode())))
+        assert [row["email"] for row in rows] == [
+            "export0@test.com",
+            "export1@test.com",
+            "export2@test.com",
+        ]
+
+    def test_export_endpoint(
+        self, client: TestClient, db_session: Session, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+        add_users(db_session, 2)
+
+        response = client.get("/api/v1/users/export")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = client.get(
+            "/api/v1/users/export",
+            params={"format": "csv"},
+            headers={"X-Admin-Key": "admin-secret"},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="users.csv"' in response.headers["content-disposition"]
+        assert len(response.text.splitlines()) == 3
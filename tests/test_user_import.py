@@ -0,0 +1,181 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from src.auth import service as auth_service
+from src.entities.user import User
+from src.settings import settings
+from src.users import importer
+
+
+def ndjson(*rows) -> str:
+    return "\n".join(json.dumps(row) for row in rows)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        yield pool
+
+
+class TestUserImport:
+    def test_import_ndjson_reports_row_errors(self, db_session: Session, executor):
+        db_session.add(
+            User(
+                email="taken@test.com",
+                first_name="Taken",
+                last_name="User",
+                password_hash="x",
+            )
+        )
+        db_session.commit()
+
+        user_importer = importer.UserImporter(
+            db_session, "ndjson", executor, batch_size=2
+        )
+        user_importer.add_lines(
+            ndjson(
+                {
+                    "email": "a@test.com",
+                    "first_name": "A",
+                    "last_name": "One",
+                    "password": "pw-a",
+                },
+                {
+                    "email": "taken@test.com",
+                    "first_name": "T",
+                    "last_name": "Two",
+                    "password": "pw",
+                },
+                {
+                    "email": "not-an-email",
+                    "first_name": "B",
+                    "last_name": "Three",
+                    "password": "pw",
+                },
+                {
+                    "email": "a@test.com",
+                    "first_name": "A",
+                    "last_name": "Again",
+                    "password": "pw",
+                },
+                {
+                    "email": "c@test.com",
+                    "first_name": "C",
+                    "last_name": "Four",
+                    "password": "pw-c",
+                },
+            ).splitlines()
+            + ["{not json"]
+        )
+        report = user_importer.finish()
+
+        assert report.inserted == 2
+        assert report.failed == 4
+        assert {(error.line, error.error) for error in report.errors} == {
+            (2, "Email already registered"),
+            (3, "Invalid fields: email"),
+            (4, "Email already registered"),
+            (
+                6,
+                "Malformed row: Expecting property name enclosed in double quotes: line 1 column 2 (char 1)",
+            ),
+        }
+
+        user = db_session.query(User).filter_by(email="c@test.com").one()
+        assert auth_service.verify_password("pw-c", user.password_hash)
+
+    def test_rows_that_do_not_fit_the_columns_are_row_errors(
+        self, db_session: Session, executor
+    ):
+        user_importer = importer.UserImporter(db_session, "ndjson", executor)
+        user_importer.add_lines(
+            ndjson(
+                {
+                    "email": "long@test.com",
+                    "first_name": "L" * 51,
+                    "last_name": "Name",
+                    "password": "pw",
+                },
+                {
+                    "email": "nul@test.com",
+                    "first_name": "Nul",
+                    "last_name": "Na\x00me",
+                    "password": "pw",
+                },
+                {
+                    "email": "ok@test.com",
+                    "first_name": "O" * 50,
+                    "last_name": "Kay",
+                    "password": "pw",
+                },
+            ).splitlines()
+        )
+        report = user_importer.finish()
+
+        assert report.inserted == 1
+        assert [(error.line, error.error) for error in report.errors] == [
+            (1, "Invalid fields: first_name"),
+            (2, "Invalid fields: last_name"),
+        ]
+        assert db_session.query(User).filter_by(email="ok@test.com").one()
+
+    def test_import_csv(self, db_session: Session, executor):
+        user_importer = importer.UserImporter(db_session, "csv", executor)
+        user_importer.add_lines(
+            [
+                "email,first_name,last_name,password,disabled",
+                "csv1@test.com,Csv,One,pw1,true",
+                "csv2@test.com,Csv,Two,pw2,",
+                "csv3@test.com,Csv",
+            ]
+        )
+        report = user_importer.finish()
+
+        assert report.inserted == 2
+        assert report.errors[0].line == 4
+        assert db_session.query(User).filter_by(email="csv1@test.com").one().disabled
+
+    def test_import_endpoint_requires_admin(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+
+        response = client.post("/api/v1/users/import", content="")
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = client.post(
+            "/api/v1/users/import", content="", headers={"X-Admin-Key": "wrong"}
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_import_endpoint_streams_body(
+        self, client: TestClient, monkeypatch, executor
+    ):
+        monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-secret")
+        monkeypatch.setattr(importer, "get_import_executor", lambda: executor)
+
+        body = ndjson(
+            {
+                "email": "s1@test.com",
+                "first_name": "S",
+                "last_name": "One",
+                "password": "pw",
+            },
+            {
+                "email": "s2@test.com",
+                "first_name": "S",
+                "last_name": "Two",
+                "password": "pw",
+            },
+        )
+        response = client.post(
+            "/api/v1/users/import?format=ndjson",
+            content=(chunk.encode() for chunk in (body[:7], body[7:])),
+            headers={"X-Admin-Key": "admin-secret"},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"inserted": 2, "failed": 0, "errors": []}
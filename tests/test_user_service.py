@@ -1,15 +1,27 @@
+import threading
+from datetime import datetime, timedelta
+
 import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.auth import service as auth_service
 from src.entities.user import User
 from src.exceptions import (
+    InvalidCursorError,
     InvalidPasswordError,
     PasswordMismatchError,
     UserNotFoundError,
 )
 from src.users import service as user_service
-from src.users.model import PasswordChange
+from src.users.cache import (
+    MemoryUserCacheBackend,
+    RedisUserCacheBackend,
+    UserCache,
+    user_cache,
+)
+from src.users.model import CachedProfile, PasswordChange, UserResponse
+from tests.fakes import FakeRedis
 
 
 class TestUserServive:
@@ -24,6 +36,78 @@ class TestUserServive:
         with pytest.raises(UserNotFoundError):
             user_service.get_user_by_id(db_session, 2)
 
+    def test_get_user_profile_is_cached(self, db_session: Session, test_user: User):
+        user_cache.clear()
+        db_session.add(test_user)
+        db_session.commit()
+
+        profile = user_service.get_user_profile(db_session, test_user.id)
+        assert profile.email == test_user.email
+
+        test_user.first_name = "Renamed"
+        db_session.commit()
+        assert user_service.get_user_profile(db_session, test_user.id).first_name == (
+            "Test"
+        )
+
+        user_cache.invalidate(test_user.id)
+        assert user_service.get_user_profile(db_session, test_user.id).first_name == (
+            "Renamed"
+        )
+        user_cache.clear()
+
+    def test_profile_etag(self, db_session: Session, test_user: User):
+        user_cache.clear()
+        db_session.add(test_user)
+        db_session.commit()
+
+        profile, etag = user_service.get_user_profile_if_modified(
+            db_session, test_user.id
+        )
+        assert profile is not None and etag.startswith(f'W/"{test_user.id}-')
+
+        profile, _ = user_service.get_user_profile_if_modified(
+            db_session, test_user.id, etag
+        )
+        assert profile is None, "served from the cache"
+
+        user_cache.clear()
+        profile, _ = user_service.get_user_profile_if_modified(
+            db_session, test_user.id, f'"other", {etag}'
+        )
+        assert profile is None, "checked against updated_at only"
+        assert user_cache.get(test_user.id) is None
+
+        test_user.first_name = "Renamed"
+        db_session.commit()
+        profile, new_etag = user_service.get_user_profile_if_modified(
+            db_session, test_user.id, etag
+        )
+        assert profile is not None and profile.first_name == "Renamed"
+        assert new_etag != etag
+        user_cache.clear()
+
+    def test_change_password_invalidates_cache(
+        self, db_session: Session, test_user: User
+    ):
+        user_cache.clear()
+        db_session.add(test_user)
+        db_session.commit()
+        user_service.get_user_profile(db_session, test_user.id)
+        assert user_cache.get(test_user.id) is not None
+
+        user_service.change_password(
+            db_session,
+            test_user.id,
+            PasswordChange(
+                current_password="Testpassword124",
+                new_password="newpassword123",
+                new_password_confirm="newpassword123",
+            ),
+        )
+
+        assert user_cache.get(test_user.id) is None
+
     def test_change_password(self, db_session: Session, test_user: User):
         db_session.add(test_user)
         db_session.commit()
@@ -71,3 +155,175 @@ class TestUserServive:
             )
 
             user_service.change_password(db_session, test_user.id, password_change)
+
+    @pytest.mark.asyncio
+    async def test_get_user_by_id_async(
+        self, async_db_session: AsyncSession, test_user: User
+    ):
+        async_db_session.add(test_user)
+        await async_db_session.commit()
+
+        user = await user_service.get_user_by_id_async(async_db_session, test_user.id)
+        assert user.email == test_user.email
+
+        with pytest.raises(UserNotFoundError):
+            await user_service.get_user_by_id_async(async_db_session, 2)
+
+    @pytest.mark.asyncio
+    async def test_change_password_async(
+        self, async_db_session: AsyncSession, test_user: User
+    ):
+        async_db_session.add(test_user)
+        await async_db_session.commit()
+
+        with pytest.raises(InvalidPasswordError):
+            await user_service.change_password_async(
+                async_db_session,
+                test_user.id,
+                PasswordChange(
+                    current_password="WrongPassword124",
+                    new_password="newpassword123",
+                    new_password_confirm="newpassword123",
+                ),
+            )
+
+        await user_service.change_password_async(
+            async_db_session,
+            test_user.id,
+            PasswordChange(
+                current_password="Testpassword124",
+                new_password="newpassword123",
+                new_password_confirm="newpassword123",
+            ),
+        )
+
+        assert auth_service.verify_password("newpassword123", test_user.password_hash)
+
+
+class TestUserCache:
+    profile = CachedProfile(
+        profile=UserResponse(
+            id=7,
+            email="cached@test.com",
+            first_name="Cached",
+            last_name="User",
+            image_url="",
+            disabled=False,
+        ),
+        etag='W/"7-1"',
+    )
+
+    def test_memory_backend(self):
+        cache = UserCache(MemoryUserCacheBackend(maxsize=1, ttl=60))
+        assert cache.get(7) is None
+
+        cache.set(self.profile)
+        assert cache.get(7) == self.profile
+
+        cache.set(
+            self.profile.model_copy(
+                update={"profile": self.profile.profile.model_copy(update={"id": 8})}
+            )
+        )
+        assert cache.get(7) is None, "least recently used entry is evicted"
+
+        cache.invalidate(8)
+        assert cache.get(8) is None
+
+    def test_memory_backend_expires(self):
+        cache = UserCache(MemoryUserCacheBackend(maxsize=10, ttl=0))
+        cache.set(self.profile)
+        assert cache.get(7) is None
+
+    def test_redis_backend(self):
+        client = FakeRedis()
+        cache = UserCache(RedisUserCacheBackend(client, ttl=30))
+
+        cache.set(self.profile)
+        assert client.get("user-profile:7") is not None
+        assert cache.get(7) == self.profile
+
+        cache.invalidate(7)
+        assert cache.get(7) is None
+
+    @pytest.mark.asyncio
+    async def test_redis_backend_runs_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        threads = []
+
+        class RecordingRedis(FakeRedis):
+            def get(self, key):
+                threads.append(threading.get_ident())
+                return super().get(key)
+
+        cache = UserCache(RedisUserCacheBackend(RecordingRedis(), ttl=30))
+        await cache.set_async(self.profile)
+        assert await cache.get_async(7) == self.profile
+        await cache.invalidate_async(7)
+        assert await cache.get_async(7) is None
+
+        assert threads and loop_thread not in threads
+
+    def test_disabled_cache(self):
+        cache = UserCache(None)
+        cache.set(self.profile)
+        assert cache.get(7) is None
+
+
+class TestListUsers:
+    @pytest.fixture
+    def users(self, db_session: Session) -> list[User]:
+        start = datetime(2024, 1, 1)
+        users = [
+            User(
+                email=f"user{i}@test.com" if i != 3 else "admin_3@test.com",
+                first_name="User",
+                last_name=str(i),
+                password_hash="x",
+                disabled=i % 2 == 1,
+                # Two users share a timestamp so ties are broken by id.
+                created_at=start + timedelta(days=min(i, 4)),
+            )
+            for i in range(6)
+        ]
+        db_session.add_all(users)
+        db_session.commit()
+        return users
+
+    def test_pages_cover_all_users_newest_first(
+        self, db_session: Session, users: list[User]
+    ):
+        seen = []
+        cursor = None
+        while True:
+            page = user_service.list_users(db_session, limit=2, cursor=cursor)
+            seen.extend(item["id"] for item in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+
+        expected = sorted(users, key=lambda u: (u.created_at, u.id), reverse=True)
+        assert seen == [user.id for user in expected]
+
+    def test_filters_and_fields(self, db_session: Session, users: list[User]):
+        page = user_service.list_users(
+            db_session, disabled=True, fields=["email", "id"]
+        )
+        assert [set(item) for item in page.items] == [{"email", "id"}] * 3
+        assert {item["id"] for item in page.items} == {
+            user.id for user in users if user.disabled
+        }
+
+        page = user_service.list_users(db_session, email_prefix="admin_")
+        assert [item["email"] for item in page.items] == ["admin_3@test.com"]
+
+        page = user_service.list_users(
+            db_session,
+            created_after=datetime(2024, 1, 2),
+            created_before=datetime(2024, 1, 4),
+        )
+        assert [item["last_name"] for item in page.items] == ["2", "1"]
+
+    def test_invalid_cursor(self, db_session: Session):
+        with pytest.raises(InvalidCursorError):
+            user_service.list_users(db_session, cursor="not-a-cursor")